@@ -0,0 +1,332 @@
+import csv
+import itertools
+import json
+import os
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+import click
+import requests
+import numpy as np
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import db
+from models.user import User, normalize_username, normalize_email
+from models.user_preference import UserPreference
+from models.user_reading_stats import UserReadingStats
+from models.user_summary import UserSummary
+from models.sync_tombstone import SyncTombstone
+from routes.auth import validate_email, validate_password
+from utils.password_hashing import password_hasher
+from utils.prayer_calendar import prayer_calendar
+from utils.prayer_times import DEFAULT_METHOD, compute_prayer_times
+from utils.quran_corpus import build_corpus
+from utils.revocation import revocation_list
+from utils.user_summary import rebuild_all_summaries, rebuild_summaries
+
+users_cli = AppGroup('users', help='User administration commands.')
+prayer_cli = AppGroup('prayer-times', help='Prayer time calculation commands.')
+quran_cli = AppGroup('quran', help='Quran corpus commands.')
+
+IMPORT_FIELDS = ('first_name', 'last_name', 'phone', 'country', 'city')
+
+QURAN_API_URL = 'http://api.alquran.cloud/v1'
+
+
+def _insert(table):
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _read_records(source, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(source)
+    else:
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _clean(record):
+    """Normalize an input record the way ``auth.register()`` does; None if invalid.
+    
+    Fields must be strings (or missing) and fit their columns, so one bad
+    row is counted as invalid instead of failing its whole batch.
+    """
+    if not isinstance(record, dict):
+        return None
+    fields = {}
+    for field in ('username', 'email', 'password', 'gender') + IMPORT_FIELDS:
+        value = record.get(field)
+        if value is None:
+            value = ''
+        elif not isinstance(value, str):
+            return None
+        fields[field] = value if field == 'password' else value.strip()
+    
+    username = fields['username']
+    email = fields['email'].lower()
+    password = fields['password']
+    if not username or not validate_email(email) or not validate_password(password):
+        return None
+    
+    row = {
+        'public_id': str(uuid.uuid4()),
+        'username': username,
+        'username_normalized': normalize_username(username),
+        'email': email,
+        'email_normalized': normalize_email(email),
+        'password': password
+    }
+    for field in IMPORT_FIELDS:
+        row[field] = fields[field] or None
+    row['gender'] = fields['gender'] if fields['gender'] in ['male', 'female'] else None
+    
+    columns = User.__table__.c
+    if any(value is not None and len(value) > columns[field].type.length
+           for field, value in row.items() if field != 'password'):
+        return None
+    return row
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(f.read().strip() or 0)
+
+
+def _write_checkpoint(path, rows_done):
+    if not path:
+        return
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(rows_done))
+    os.replace(tmp_path, path)
+
+
+def _import_batch(batch):
+    """Insert one batch of cleaned rows; returns the number of users created."""
+    passwords = [row.pop('password') for row in batch]
+    for row, password_hash in zip(batch, password_hasher.hash_many(passwords)):
+        row['password_hash'] = password_hash
+    
+    users = User.__table__
+    with db.engine.begin() as connection:
+        # Rows whose username/email already exist are skipped, which also makes
+        # re-running a partially imported batch safe
+        stmt = _insert(users).on_conflict_do_nothing().returning(users.c.id)
+        user_ids = [user_id for (user_id,) in connection.execute(stmt, batch)]
+        
+        if user_ids:
+            connection.execute(
+                UserPreference.__table__.insert(),
+                [{'user_id': user_id} for user_id in user_ids]
+            )
+            connection.execute(
+                UserReadingStats.__table__.insert(),
+                [{'user_id': user_id} for user_id in user_ids]
+            )
+            connection.execute(
+                UserSummary.__table__.insert(),
+                [{'user_id': user_id} for user_id in user_ids]
+            )
+    
+    return len(user_ids)
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help='Input format; guessed from the file extension by default.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Users hashed and inserted per transaction.')
+@click.option('--workers', default=os.cpu_count(), show_default=True,
+              help='Processes used for password hashing.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='File recording how many input rows are done; resumes from it.')
+def import_users(source, fmt, batch_size, workers, checkpoint):
+    """Bulk-create users from a CSV or NDJSON file.
+    
+    Each record needs username, email and password, and may carry
+    first_name, last_name, phone, country, city and gender. Default
+    preferences, reading stats and summary rows are created as in
+    registration. Existing
+    usernames/emails and invalid records are skipped.
+    """
+    if fmt is None:
+        fmt = 'csv' if source.name.endswith('.csv') else 'ndjson'
+    password_hasher.workers = workers
+    
+    skip = _read_checkpoint(checkpoint)
+    records = itertools.islice(_read_records(source, fmt), skip, None)
+    if skip:
+        click.echo(f'Resuming after {skip} rows')
+    
+    done, created, invalid = skip, 0, 0
+    started = time.monotonic()
+    
+    while True:
+        chunk = list(itertools.islice(records, batch_size))
+        if not chunk:
+            break
+        
+        batch = []
+        for record in chunk:
+            row = _clean(record)
+            if row is None:
+                invalid += 1
+            else:
+                batch.append(row)
+        
+        if batch:
+            created += _import_batch(batch)
+        done += len(chunk)
+        _write_checkpoint(checkpoint, done)
+        
+        rate = (done - skip) / max(time.monotonic() - started, 1e-6)
+        click.echo(f'{done} rows: {created} created, {invalid} invalid ({rate:.0f} rows/s)')
+    
+    password_hasher.shutdown()
+    elapsed = time.monotonic() - started
+    click.echo(
+        f'Done in {elapsed:.1f}s: {created} created, {invalid} invalid, '
+        f'{done - skip - created - invalid} already existed'
+    )
+
+
+@users_cli.command('normalize-logins')
+@click.option('--batch-size', default=1000, show_default=True)
+def normalize_logins(batch_size):
+    """Fill username_normalized/email_normalized with the login normalizers.
+    
+    Run after migration 004 and before 011. Nothing is written if two users
+    would share a login key; the clashes are listed so they can be renamed.
+    """
+    table = User.__table__
+    usernames, emails = {}, {}
+    updates = []
+    for row in db.session.execute(
+        select(table.c.id, table.c.username, table.c.email,
+                  table.c.username_normalized, table.c.email_normalized)
+        .order_by(table.c.id)
+        .execution_options(yield_per=batch_size)
+    ):
+        username, email = normalize_username(row.username), normalize_email(row.email)
+        usernames.setdefault(username, []).append(row.username)
+        emails.setdefault(email, []).append(row.email)
+        if (username, email) != (row.username_normalized, row.email_normalized):
+            updates.append({'user_id': row.id, 'login_username': username, 'login_email': email})
+    
+    clashes = [names for names in itertools.chain(usernames.values(), emails.values()) if len(names) > 1]
+    if clashes:
+        for names in clashes:
+            click.echo('Same login key: ' + ', '.join(names), err=True)
+        raise click.ClickException(f'{len(clashes)} login keys are shared; rename those users first')
+    
+    stmt = table.update().where(table.c.id == bindparam('user_id')).values(
+        username_normalized=bindparam('login_username'),
+        email_normalized=bindparam('login_email')
+    )
+    for start in range(0, len(updates), batch_size):
+        db.session.execute(stmt, updates[start:start + batch_size])
+        db.session.commit()
+    click.echo(f'Updated {len(updates)} of {sum(map(len, usernames.values()))} users')
+
+
+@users_cli.command('prune-tokens')
+def prune_tokens():
+    """Delete revoked-token rows whose tokens have expired anyway."""
+    deleted = revocation_list.prune_table()
+    click.echo(f'Deleted {deleted} expired revocations')
+
+
+@users_cli.command('rebuild-summaries')
+@click.option('--user-id', 'user_ids', type=int, multiple=True,
+              help='Only rebuild these users (repeatable); all users by default.')
+@click.option('--batch-size', default=1000, show_default=True)
+def rebuild_user_summaries(user_ids, batch_size):
+    """Recompute dashboard summaries from the tasbeh, phrase and reading tables."""
+    started = time.monotonic()
+    if user_ids:
+        done = len(rebuild_summaries(user_ids))
+        db.session.commit()
+    else:
+        done = 0
+        for done in rebuild_all_summaries(batch_size):
+            click.echo(f'{done} users rebuilt')
+    click.echo(f'Done in {time.monotonic() - started:.1f}s: {done} summaries rebuilt')
+
+
+@users_cli.command('prune-tombstones')
+def prune_tombstones():
+    """Delete sync tombstones older than SYNC_TOMBSTONE_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config['SYNC_TOMBSTONE_DAYS'])
+    deleted = SyncTombstone.query.filter(SyncTombstone.deleted_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f'Deleted {deleted} tombstones older than {cutoff:%Y-%m-%d}')
+
+
+@prayer_cli.command('benchmark')
+@click.option('--locations', default=10000, show_default=True)
+@click.option('--days', default=365, show_default=True)
+@click.option('--method', default=DEFAULT_METHOD, show_default=True)
+@click.option('--seed', default=0, show_default=True)
+def benchmark_calendar(locations, days, method, seed):
+    """Time the vectorized calendar against the per-day calculation."""
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(-60, 60, locations)
+    longitudes = rng.uniform(-180, 180, locations)
+    # Fixed-offset zones near each longitude; Etc/GMT signs are inverted
+    offsets = np.round(longitudes / 15).astype(int)
+    timezones = [f'Etc/GMT{-offset:+d}' for offset in offsets]
+    start = date(date.today().year, 1, 1)
+    
+    started = time.perf_counter()
+    prayer_calendar(latitudes, longitudes, start, days, timezones, method=method)
+    vectorized = time.perf_counter() - started
+    
+    # The scalar path is timed on a sample and extrapolated
+    sample = min(locations, 20)
+    started = time.perf_counter()
+    for latitude, longitude, offset in zip(latitudes[:sample], longitudes[:sample], offsets[:sample]):
+        for day in range(days):
+            compute_prayer_times(latitude, longitude, start + timedelta(days=day), float(offset), method=method)
+    scalar = (time.perf_counter() - started) * locations / sample
+    
+    total = locations * days
+    click.echo(f'{locations} locations x {days} days = {total} location-days ({method})')
+    click.echo(f'vectorized: {vectorized:.2f}s ({total / vectorized:,.0f} location-days/s)')
+    click.echo(f'per-day:    {scalar:.2f}s ({total / scalar:,.0f} location-days/s, extrapolated)')
+    click.echo(f'speedup:    {scalar / vectorized:.1f}x')
+
+
+@quran_cli.command('build')
+@click.option('--edition', 'editions', multiple=True,
+              help='alquran.cloud edition to download (repeatable).')
+@click.option('--source', 'sources', type=click.File('r', encoding='utf-8'), multiple=True,
+              help='Saved /v1/quran/<edition> JSON to use instead of downloading (repeatable).')
+@click.option('--output', type=click.Path(dir_okay=False),
+              help='Corpus file to write; QURAN_CORPUS_PATH by default.')
+def build_quran(editions, sources, output):
+    """Pack Quran editions into the memory-mapped corpus file.
+    
+    The first edition (saved sources before downloads) supplies the surah,
+    juz and page structure. Downloads quran-uthmani when nothing is given.
+    """
+    output = output or current_app.config['QURAN_CORPUS_PATH']
+    payloads = [json.load(source) for source in sources]
+    for edition in editions or (() if sources else ('quran-uthmani',)):
+        click.echo(f'Downloading {edition}')
+        response = requests.get(f'{QURAN_API_URL}/quran/{edition}', timeout=60)
+        response.raise_for_status()
+        payloads.append(response.json())
+    
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    ayahs = build_corpus([payload.get('data', payload) for payload in payloads], output)
+    click.echo(f'Wrote {ayahs} ayahs x {len(payloads)} editions to {output} ({os.path.getsize(output):,} bytes)')
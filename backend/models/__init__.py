@@ -1,17 +1,32 @@
 from .user import User
 from .user_phrase import UserPhrase
+from .tasbeh_phrase import TasbehPhrase
 from .tasbeh_count import TasbehCount
+from .tasbeh_device import TasbehDevice
+from .tasbeh_device_counter import TasbehDeviceCounter
+from .tasbeh_history import TasbehHourlyBucket, TasbehDailyBucket
 from .user_location import UserLocation
 from .user_preference import UserPreference
 from .user_reading_stats import UserReadingStats
 from .user_achievement import UserAchievement
+from .user_summary import UserSummary
+from .revoked_token import RevokedToken
+from .sync_tombstone import SyncTombstone
 
 __all__ = [
     'User',
     'UserPhrase',
+    'TasbehPhrase',
     'TasbehCount',
+    'TasbehDevice',
+    'TasbehDeviceCounter',
+    'TasbehHourlyBucket',
+    'TasbehDailyBucket',
     'UserLocation',
     'UserPreference',
     'UserReadingStats',
-    'UserAchievement'
+    'UserAchievement',
+    'UserSummary',
+    'RevokedToken',
+    'SyncTombstone'
 ]
@@ -0,0 +1,25 @@
+from database import db
+from datetime import datetime
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)  # access, refresh
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    # When the token would have expired anyway; rows past this are pruned
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'jti': self.jti,
+            'token_type': self.token_type,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None
+        }
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
@@ -0,0 +1,28 @@
+from database import db
+from datetime import datetime
+
+class SyncTombstone(db.Model):
+    """Marks a deleted user-owned row so /api/sync can report the deletion."""
+    __tablename__ = 'sync_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)      # sync section, e.g. 'phrases'
+    entity_key = db.Column(db.String(200), nullable=False)  # the deleted row's key in that section
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (db.Index('idx_sync_tombstones_user_deleted', 'user_id', 'deleted_at'),)
+    
+    @classmethod
+    def record(cls, user_id, entity, entity_key):
+        db.session.add(cls(user_id=user_id, entity=entity, entity_key=str(entity_key)))
+    
+    def to_dict(self):
+        return {
+            'entity': self.entity,
+            'key': self.entity_key,
+            'deleted_at': self.deleted_at.isoformat() if self.deleted_at else None
+        }
+    
+    def __repr__(self):
+        return f'<SyncTombstone {self.entity}:{self.entity_key}>'
@@ -1,17 +1,25 @@
 from database import db
 from datetime import datetime
+from utils.phrase_catalog import phrase_catalog
 
 class TasbehCount(db.Model):
     __tablename__ = 'tasbeh_counts'
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    phrase = db.Column(db.String(200), nullable=False)
+    phrase_id = db.Column(db.SmallInteger, db.ForeignKey('tasbeh_phrases.id'), nullable=False)
     count = db.Column(db.Integer, default=0)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
     
-    # Unique constraint for user and phrase combination
-    __table_args__ = (db.UniqueConstraint('user_id', 'phrase', name='unique_user_phrase'),)
+    # Unique constraint for user and phrase combination; last_updated index serves /api/sync
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'phrase_id', name='unique_user_phrase'),
+        db.Index('idx_tasbeh_counts_user_updated', 'user_id', 'last_updated'),
+    )
+    
+    @property
+    def phrase(self):
+        return phrase_catalog.text_for(self.phrase_id)
     
     def to_dict(self):
         return {
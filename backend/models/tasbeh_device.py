@@ -0,0 +1,33 @@
+from database import db
+from datetime import datetime
+
+class TasbehDevice(db.Model):
+    __tablename__ = 'tasbeh_devices'
+    
+    # client_seq values accepted ahead of last_seq (bits in seq_window)
+    SEQ_WINDOW = 63
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    device_id = db.Column(db.String(100), nullable=False)
+    # Every client_seq up to here has been applied; anything at or below is a replay
+    last_seq = db.Column(db.BigInteger, default=0, nullable=False)
+    # Bit n set: last_seq + 1 + n was applied ahead of a gap
+    seq_window = db.Column(db.BigInteger, default=0, nullable=False)
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'device_id', name='unique_user_device'),)
+    
+    counters = db.relationship('TasbehDeviceCounter', backref='device', lazy=True, cascade='all, delete-orphan')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'device_id': self.device_id,
+            'last_seq': self.last_seq,
+            'seq_window': self.seq_window,
+            'last_seen_at': self.last_seen_at.isoformat() if self.last_seen_at else None
+        }
+    
+    def __repr__(self):
+        return f'<TasbehDevice {self.device_id}: {self.last_seq}>'
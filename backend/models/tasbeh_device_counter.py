@@ -0,0 +1,16 @@
+from database import db
+
+class TasbehDeviceCounter(db.Model):
+    """Cumulative (grow-only) count one device has reported for one phrase.
+    
+    Keyed by the device row and phrase only; the user is the device's.
+    Merges keep the maximum seen, so re-uploads are idempotent.
+    """
+    __tablename__ = 'tasbeh_device_counters'
+    
+    device_id = db.Column(db.Integer, db.ForeignKey('tasbeh_devices.id', ondelete='CASCADE'), primary_key=True)
+    phrase_id = db.Column(db.SmallInteger, db.ForeignKey('tasbeh_phrases.id'), primary_key=True)
+    count = db.Column(db.BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f'<TasbehDeviceCounter {self.device_id}/{self.phrase_id}: {self.count}>'
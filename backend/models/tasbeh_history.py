@@ -0,0 +1,47 @@
+from database import db
+from utils.phrase_catalog import phrase_catalog
+
+class TasbehHourlyBucket(db.Model):
+    """Tasbeh count per user, phrase and UTC hour"""
+    __tablename__ = 'tasbeh_hourly'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    phrase_id = db.Column(db.SmallInteger, db.ForeignKey('tasbeh_phrases.id'), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # Leading (user_id, bucket_start) serves both the upsert and range scans
+    __table_args__ = (db.UniqueConstraint('user_id', 'bucket_start', 'phrase_id', name='unique_user_hour_phrase'),)
+    
+    def to_dict(self):
+        return {
+            'bucket_start': self.bucket_start.isoformat(),
+            'phrase': phrase_catalog.text_for(self.phrase_id),
+            'count': self.count
+        }
+    
+    def __repr__(self):
+        return f'<TasbehHourlyBucket {self.bucket_start} {self.phrase_id}: {self.count}>'
+
+class TasbehDailyBucket(db.Model):
+    """Tasbeh count per user, phrase and UTC day"""
+    __tablename__ = 'tasbeh_daily'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    phrase_id = db.Column(db.SmallInteger, db.ForeignKey('tasbeh_phrases.id'), nullable=False)
+    count = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'day', 'phrase_id', name='unique_user_day_phrase'),)
+    
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'phrase': phrase_catalog.text_for(self.phrase_id),
+            'count': self.count
+        }
+    
+    def __repr__(self):
+        return f'<TasbehDailyBucket {self.day} {self.phrase_id}: {self.count}>'
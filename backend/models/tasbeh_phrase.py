@@ -0,0 +1,17 @@
+from database import db
+
+class TasbehPhrase(db.Model):
+    """Catalog of tasbeh phrases; counters reference these small integer IDs"""
+    __tablename__ = 'tasbeh_phrases'
+    
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    text = db.Column(db.String(200), unique=True, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'text': self.text
+        }
+    
+    def __repr__(self):
+        return f'<TasbehPhrase {self.id}: {self.text}>'
@@ -1,9 +1,16 @@
 from database import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
 from flask_jwt_extended import create_access_token, create_refresh_token
+from utils.password_hashing import password_hasher
 from datetime import datetime
 import uuid
 
+def normalize_username(username):
+    return username.strip().casefold()
+
+def normalize_email(email):
+    return email.strip().lower()
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -11,6 +18,10 @@ class User(db.Model):
     public_id = db.Column(db.String(50), unique=True, nullable=False)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
+    # Lookup keys kept in sync by the validators below; login and uniqueness
+    # checks compare against these so they hit a single unique index
+    username_normalized = db.Column(db.String(80), unique=True, nullable=False)
+    email_normalized = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     first_name = db.Column(db.String(50), nullable=True)
     last_name = db.Column(db.String(50), nullable=True)
@@ -25,6 +36,9 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    is_admin = db.Column(db.Boolean, default=False)
+    # Bumped on every write to the user's data; used as the ETag for reads
+    data_version = db.Column(db.Integer, default=0, nullable=False)
     
     def __init__(self, **kwargs):
         super(User, self).__init__(**kwargs)
@@ -34,16 +48,45 @@ class User(db.Model):
     # Relationships
     phrases = db.relationship('UserPhrase', backref='user', lazy=True, cascade='all, delete-orphan')
     tasbeh_counts = db.relationship('TasbehCount', backref='user', lazy=True, cascade='all, delete-orphan')
+    tasbeh_devices = db.relationship('TasbehDevice', backref='user', lazy=True, cascade='all, delete-orphan')
+    tasbeh_hourly_buckets = db.relationship('TasbehHourlyBucket', backref='user', lazy=True, cascade='all, delete-orphan')
+    tasbeh_daily_buckets = db.relationship('TasbehDailyBucket', backref='user', lazy=True, cascade='all, delete-orphan')
     location = db.relationship('UserLocation', backref='user', uselist=False, cascade='all, delete-orphan')
     preferences = db.relationship('UserPreference', backref='user', uselist=False, cascade='all, delete-orphan')
     reading_stats = db.relationship('UserReadingStats', backref='user', uselist=False, cascade='all, delete-orphan')
+    summary = db.relationship('UserSummary', backref='user', uselist=False, cascade='all, delete-orphan')
     achievements = db.relationship('UserAchievement', backref='user', lazy=True, cascade='all, delete-orphan')
+    revoked_tokens = db.relationship('RevokedToken', backref='user', lazy=True, cascade='all, delete-orphan')
+    sync_tombstones = db.relationship('SyncTombstone', backref='user', lazy=True, cascade='all, delete-orphan')
+    
+    @validates('username')
+    def _set_username_normalized(self, key, username):
+        self.username_normalized = normalize_username(username)
+        return username
+    
+    @validates('email')
+    def _set_email_normalized(self, key, email):
+        self.email_normalized = normalize_email(email)
+        return email
+    
+    @classmethod
+    def find_by_login(cls, identifier):
+        """Look up a user by username or email with one indexed equality."""
+        if '@' in identifier:
+            user = cls.query.filter_by(email_normalized=normalize_email(identifier)).first()
+            # Usernames were never forbidden from containing '@'
+            if user is not None:
+                return user
+        return cls.query.filter_by(username_normalized=normalize_username(identifier)).first()
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
     
     def generate_tokens(self):
         access_token = create_access_token(identity=self.public_id)
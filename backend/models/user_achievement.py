@@ -10,6 +10,9 @@ class UserAchievement(db.Model):
     achievement_name = db.Column(db.String(100), nullable=False)
     achievement_data = db.Column(db.JSON, default=dict)
     earned_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.Index('idx_user_achievements_user_updated', 'user_id', 'updated_at'),)
     
     def to_dict(self):
         return {
@@ -17,7 +20,8 @@ class UserAchievement(db.Model):
             'achievement_type': self.achievement_type,
             'achievement_name': self.achievement_name,
             'achievement_data': self.achievement_data,
-            'earned_at': self.earned_at.isoformat() if self.earned_at else None
+            'earned_at': self.earned_at.isoformat() if self.earned_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def __repr__(self):
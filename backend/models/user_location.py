@@ -11,7 +11,7 @@ class UserLocation(db.Model):
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
     timezone = db.Column(db.String(50))
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -8,12 +8,20 @@ class UserPhrase(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     phrase = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Keyset pagination of a user's phrases (newest first) and /api/sync
+    __table_args__ = (
+        db.Index('idx_user_phrases_user_created', 'user_id', created_at.desc(), id.desc()),
+        db.Index('idx_user_phrases_user_updated', 'user_id', 'updated_at'),
+    )
     
     def to_dict(self):
         return {
             'id': self.id,
             'phrase': self.phrase,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def __repr__(self):
@@ -12,6 +12,7 @@ class UserReadingStats(db.Model):
     total_reading_days = db.Column(db.Integer, default=0)
     last_reading_date = db.Column(db.Date)
     favorite_reciter = db.Column(db.String(50), default='ar.alafasy')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
         return {
@@ -21,7 +22,8 @@ class UserReadingStats(db.Model):
             'daily_reading_streak': self.daily_reading_streak,
             'total_reading_days': self.total_reading_days,
             'last_reading_date': self.last_reading_date.isoformat() if self.last_reading_date else None,
-            'favorite_reciter': self.favorite_reciter
+            'favorite_reciter': self.favorite_reciter,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def __repr__(self):
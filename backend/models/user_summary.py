@@ -0,0 +1,35 @@
+from database import db
+from datetime import datetime
+
+class UserSummary(db.Model):
+    """Dashboard totals for one user, kept current by the write paths.
+    
+    Rebuild from the source tables with ``flask users rebuild-summaries``.
+    """
+    __tablename__ = 'user_summary'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    total_dhikr = db.Column(db.BigInteger, default=0, nullable=False)
+    tasbeh_phrase_count = db.Column(db.Integer, default=0, nullable=False)
+    custom_phrase_count = db.Column(db.Integer, default=0, nullable=False)
+    quran_verses_read = db.Column(db.Integer, default=0, nullable=False)
+    reading_streak = db.Column(db.Integer, default=0, nullable=False)
+    # Newest custom phrases first (UserPhrase.to_dict() output), at most RECENT_PHRASES_LIMIT
+    recent_phrases = db.Column(db.JSON, default=list, nullable=False)
+    last_activity_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    RECENT_PHRASES_LIMIT = 5
+    
+    def to_dict(self):
+        return {
+            'total_phrases': self.custom_phrase_count,
+            'total_dhikr': self.total_dhikr,
+            'total_tasbeh_phrases': self.tasbeh_phrase_count,
+            'quran_verses_read': self.quran_verses_read,
+            'reading_streak': self.reading_streak,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None
+        }
+    
+    def __repr__(self):
+        return f'<UserSummary {self.user_id}: {self.total_dhikr}>'
@@ -1,11 +1,17 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt, decode_token
+from jwt.exceptions import PyJWTError
 from database import db
-from models.user import User
+from models.user import User, normalize_username, normalize_email
 from models.user_preference import UserPreference
 from models.user_reading_stats import UserReadingStats
-from datetime import datetime
+from models.user_summary import UserSummary
+from utils import get_current_user, invalidate_current_user, load_profile, load_user, profile_dict, require_auth
+from utils.etag import bump_user_version
+from utils.login_touch import last_login_queue
+from utils.password_hashing import HashingPoolSaturated
+from utils.revocation import revocation_list
+from datetime import datetime, timezone
 import re
 import uuid
 
@@ -18,6 +24,9 @@ def validate_email(email):
 def validate_password(password):
     return len(password) >= 8
 
+def token_expiry(payload):
+    return datetime.fromtimestamp(payload['exp'], timezone.utc).replace(tzinfo=None)
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -51,11 +60,12 @@ def register():
         
         # Check if user already exists
         existing_user = User.query.filter(
-            (User.username == username) | (User.email == email)
+            (User.username_normalized == normalize_username(username)) |
+            (User.email_normalized == normalize_email(email))
         ).first()
         
         if existing_user:
-            if existing_user.username == username:
+            if existing_user.username_normalized == normalize_username(username):
                 return jsonify({'error': 'اسم المستخدم مستخدم بالفعل'}), 409
             else:
                 return jsonify({'error': 'البريد الإلكتروني مستخدم بالفعل'}), 409
@@ -70,7 +80,8 @@ def register():
             phone=phone or None,
             country=country or None,
             city=city or None,
-            gender=gender if gender in ['male', 'female'] else None
+            gender=gender if gender in ['male', 'female'] else None,
+            last_login_at=datetime.utcnow()
         )
         user.set_password(password)
         
@@ -85,10 +96,9 @@ def register():
         reading_stats = UserReadingStats(user_id=user.id)
         db.session.add(reading_stats)
         
-        db.session.commit()
+        # Create the (empty) dashboard summary
+        db.session.add(UserSummary(user_id=user.id))
         
-        # Update last login
-        user.last_login_at = datetime.utcnow()
         db.session.commit()
         
         # Generate tokens
@@ -100,6 +110,9 @@ def register():
             'tokens': tokens
         }), 201
         
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'الخادم مشغول، يرجى المحاولة بعد قليل'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         print(f"Registration error: {str(e)}")  # For debugging
@@ -120,9 +133,7 @@ def login():
             return jsonify({'error': 'اسم المستخدم وكلمة المرور مطلوبان'}), 400
         
         # Find user by username or email
-        user = User.query.filter(
-            (User.username == username) | (User.email == username)
-        ).first()
+        user = User.find_by_login(username)
         
         if not user:
             return jsonify({'error': 'اسم المستخدم أو كلمة المرور غير صحيحة'}), 401
@@ -133,35 +144,82 @@ def login():
         if not user.is_active:
             return jsonify({'error': 'الحساب غير مفعل'}), 401
         
-        # Update last login time
-        user.last_login_at = datetime.utcnow()
-        db.session.commit()
+        # Upgrade hashes made with older parameters while we have the password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+        
+        # Update last login time (written in the background)
+        login_time = datetime.utcnow()
+        last_login_queue.touch(user.id, login_time)
+        user_data = user.to_dict()
+        user_data['last_login_at'] = login_time.isoformat()
         
         # Generate tokens
         tokens = user.generate_tokens()
         
         return jsonify({
             'message': 'تم تسجيل الدخول بنجاح',
-            'user': user.to_dict(),
+            'user': user_data,
             'tokens': tokens
         }), 200
         
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'الخادم مشغول، يرجى المحاولة بعد قليل'}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"Login error: {str(e)}")  # For debugging
         return jsonify({'error': 'حدث خطأ أثناء تسجيل الدخول'}), 500
 
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    try:
+        current_user = get_current_user()
+        
+        if not current_user:
+            return jsonify({'error': 'المستخدم غير موجود'}), 404
+        
+        # Revoke the token used for this request
+        payload = get_jwt()
+        revocation_list.revoke(payload['jti'], payload['type'], current_user.id, token_expiry(payload))
+        
+        # Optionally revoke the paired refresh token as well
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                refresh = decode_token(data['refresh_token'])
+            except PyJWTError:
+                db.session.rollback()
+                return jsonify({'error': 'رمز التحديث غير صالح'}), 400
+            
+            if refresh['type'] != 'refresh' or refresh['sub'] != payload['sub']:
+                db.session.rollback()
+                return jsonify({'error': 'رمز التحديث غير صالح'}), 400
+            
+            if refresh['jti'] != payload['jti'] and not revocation_list.is_revoked(refresh['jti']):
+                revocation_list.revoke(refresh['jti'], 'refresh', current_user.id, token_expiry(refresh))
+        
+        db.session.commit()
+        
+        return jsonify({'message': 'تم تسجيل الخروج بنجاح'}), 200
+        
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception('Logout failed')
+        return jsonify({'error': 'حدث خطأ أثناء تسجيل الخروج'}), 500
+
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
+        current_user = get_current_user()
         
-        if not user or not user.is_active:
+        if not current_user or not current_user.is_active:
             return jsonify({'error': 'المستخدم غير موجود أو غير مفعل'}), 404
         
         # Generate new access token
-        access_token = create_access_token(identity=current_user_id)
+        access_token = create_access_token(identity=current_user.public_id)
         
         return jsonify({
             'access_token': access_token
@@ -172,32 +230,22 @@ def refresh():
         return jsonify({'error': 'حدث خطأ أثناء تحديث الرمز المميز'}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
-@jwt_required()
-def get_profile():
+@require_auth
+def get_profile(current_user):
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'المستخدم غير موجود'}), 404
+        user = load_profile(current_user)
         
-        return jsonify({
-            'user': user.to_dict()
-        }), 200
+        return jsonify(profile_dict(user)), 200
         
     except Exception as e:
         print(f"Get profile error: {str(e)}")  # For debugging
         return jsonify({'error': 'حدث خطأ أثناء جلب البيانات'}), 500
 
 @auth_bp.route('/profile', methods=['PUT'])
-@jwt_required()
-def update_profile():
+@require_auth
+def update_profile(current_user):
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'المستخدم غير موجود'}), 404
+        user = load_user(current_user)
         
         data = request.get_json()
         
@@ -206,7 +254,10 @@ def update_profile():
             username = data['username'].strip()
             if username != user.username:
                 # Check if username is already taken
-                if User.query.filter_by(username=username).first():
+                if User.query.filter(
+                    User.username_normalized == normalize_username(username),
+                    User.id != user.id
+                ).first():
                     return jsonify({'error': 'اسم المستخدم مستخدم بالفعل'}), 409
                 user.username = username
         
@@ -216,11 +267,16 @@ def update_profile():
                 return jsonify({'error': 'صيغة البريد الإلكتروني غير صحيحة'}), 400
             if email != user.email:
                 # Check if email is already taken
-                if User.query.filter_by(email=email).first():
+                if User.query.filter(
+                    User.email_normalized == normalize_email(email),
+                    User.id != user.id
+                ).first():
                     return jsonify({'error': 'البريد الإلكتروني مستخدم بالفعل'}), 409
                 user.email = email
         
+        bump_user_version(user.id)
         db.session.commit()
+        invalidate_current_user(user.public_id)
         
         return jsonify({
             'message': 'تم تحديث الملف الشخصي بنجاح',
@@ -233,14 +289,10 @@ def update_profile():
         return jsonify({'error': 'حدث خطأ أثناء تحديث البيانات'}), 500
 
 @auth_bp.route('/change-password', methods=['POST'])
-@jwt_required()
-def change_password():
+@require_auth
+def change_password(current_user):
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'المستخدم غير موجود'}), 404
+        user = load_user(current_user)
         
         data = request.get_json()
         current_password = data.get('current_password', '')
@@ -257,11 +309,15 @@ def change_password():
         
         user.set_password(new_password)
         db.session.commit()
+        invalidate_current_user(user.public_id)
         
         return jsonify({
             'message': 'تم تغيير كلمة المرور بنجاح'
         }), 200
         
+    except HashingPoolSaturated:
+        db.session.rollback()
+        return jsonify({'error': 'الخادم مشغول، يرجى المحاولة بعد قليل'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         print(f"Change password error: {str(e)}")  # For debugging
@@ -1,7 +1,177 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
+from models.user_location import UserLocation
+from utils import require_auth
+from utils.hijri import GREGORIAN_RANGE, gregorian_range_to_hijri, hijri_date_dict, hijri_month_dates
+from utils.prayer_cache import prayer_cache
+from utils.prayer_calendar import EVENTS, format_times, month_dates, prayer_calendar, year_dates
+from utils.prayer_times import CALCULATION_METHODS, METHOD_IDS, DEFAULT_METHOD, ASR_FACTORS, resolve_timezone
+from datetime import datetime, timedelta, MINYEAR, MAXYEAR
 
 prayer_times_bp = Blueprint('prayer_times', __name__)
 
 @prayer_times_bp.route('/test', methods=['GET'])
 def test():
-    return jsonify({'message': 'Prayer times endpoint working', 'status': 'success'})
\ No newline at end of file
+    return jsonify({'message': 'Prayer times endpoint working', 'status': 'success'})
+
+@prayer_times_bp.route('/methods', methods=['GET'])
+def get_methods():
+    """Supported calculation methods and Asr settings"""
+    ids = {name: method_id for method_id, name in METHOD_IDS.items()}
+    return jsonify({
+        'methods': [
+            {'key': key, 'id': ids.get(key), 'name': params['name']}
+            for key, params in CALCULATION_METHODS.items()
+        ],
+        'default_method': DEFAULT_METHOD,
+        'asr': list(ASR_FACTORS)
+    }), 200
+
+@prayer_times_bp.route('/hijri-date', methods=['GET'])
+def get_hijri_date():
+    """Umm Al-Qura date for ``?date=YYYY-MM-DD`` (default today)"""
+    day = datetime.now().date()
+    if request.args.get('date'):
+        try:
+            day = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    
+    try:
+        return jsonify({'date': day.isoformat(), 'islamic_date': hijri_date_dict(day)}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@prayer_times_bp.route('', methods=['GET'])
+@require_auth
+def get_prayer_times(current_user):
+    """Prayer times for ``?latitude=&longitude=`` or the saved location
+    
+    Optional: ``date`` (YYYY-MM-DD, default today at the location),
+    ``method`` (name or aladhan id), ``asr`` (standard or hanafi) and
+    ``timezone`` (IANA name; required with coordinates, otherwise defaults
+    to the saved location's).
+    """
+    try:
+        location = resolve_location(current_user.id)
+        if isinstance(location, tuple):
+            return location
+        
+        date = None
+        if request.args.get('date'):
+            try:
+                date = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+        
+        result = prayer_cache.get_prayer_times(
+            location['latitude'],
+            location['longitude'],
+            date=date,
+            method=request.args.get('method', DEFAULT_METHOD),
+            asr=request.args.get('asr', 'standard'),
+            timezone=location['timezone']
+        )
+        if not result['success']:
+            return jsonify({'error': result['error']}), 400
+        
+        del result['success']
+        result['timezone'] = location['timezone']
+        return jsonify(result), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@prayer_times_bp.route('/calendar/<int:year>/<int:month>', methods=['GET'])
+@require_auth
+def get_month_calendar(current_user, year, month):
+    """Prayer times for every day of a month; same query parameters as ``''``"""
+    if not MINYEAR < year < MAXYEAR or not 1 <= month <= 12:
+        return jsonify({'error': 'Invalid month'}), 400
+    start, days = month_dates(year, month)
+    return calendar_response(current_user.id, start, days, {'year': year, 'month': month})
+
+@prayer_times_bp.route('/calendar/<int:year>', methods=['GET'])
+@require_auth
+def get_year_calendar(current_user, year):
+    """Prayer times for every day of a year; same query parameters as ``''``"""
+    if not MINYEAR < year < MAXYEAR:
+        return jsonify({'error': 'Invalid year'}), 400
+    start, days = year_dates(year)
+    return calendar_response(current_user.id, start, days, {'year': year})
+
+@prayer_times_bp.route('/calendar/hijri/<int:year>/<int:month>', methods=['GET'])
+@require_auth
+def get_hijri_month_calendar(current_user, year, month):
+    """Prayer times for every day of a Hijri month (e.g. a Ramadan timetable)"""
+    try:
+        start, days = hijri_month_dates(year, month)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return calendar_response(current_user.id, start, days, {'hijri_year': year, 'hijri_month': month})
+
+def calendar_response(user_id, start, days, header):
+    try:
+        location = resolve_location(user_id)
+        if isinstance(location, tuple):
+            return location
+        
+        try:
+            calendar = prayer_calendar(
+                [location['latitude']],
+                [location['longitude']],
+                start,
+                days,
+                timezones=[location['timezone']],
+                method=request.args.get('method', DEFAULT_METHOD),
+                asr=request.args.get('asr', 'standard')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        columns = {name: format_times(calendar[name][0]) for name in EVENTS}
+        dates = calendar['date'].astype(str)
+        if GREGORIAN_RANGE[0] <= start and start + timedelta(days=days - 1) <= GREGORIAN_RANGE[1]:
+            hijri = ['%d-%02d-%02d' % day for day in gregorian_range_to_hijri(start, days)]
+        else:
+            hijri = [None] * days
+        return jsonify(dict(
+            header,
+            location=f"({location['latitude']:.2f}, {location['longitude']:.2f})",
+            timezone=location['timezone'],
+            days=[
+                dict({'date': dates[i], 'hijri': hijri[i]}, **{name: columns[name][i] for name in EVENTS})
+                for i in range(days)
+            ]
+        )), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def resolve_location(user_id):
+    """Coordinates and timezone from the query string, else the saved location.
+    
+    Coordinates from the query string need a ``timezone`` next to them; the
+    saved location's own timezone is used unless one is given. Returns a
+    dict, or an error response tuple.
+    """
+    timezone = request.args.get('timezone')
+    if request.args.get('latitude') is None and request.args.get('longitude') is None:
+        saved = UserLocation.query.filter_by(user_id=user_id).first()
+        if saved is None or saved.latitude is None or saved.longitude is None:
+            return jsonify({'error': 'latitude and longitude are required'}), 400
+        latitude, longitude = saved.latitude, saved.longitude
+        timezone = timezone or saved.timezone
+    else:
+        try:
+            latitude = float(request.args['latitude'])
+            longitude = float(request.args['longitude'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'latitude and longitude must be numbers'}), 400
+        if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+            return jsonify({'error': 'latitude and longitude are out of range'}), 400
+    
+    try:
+        resolve_timezone(timezone)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return {'latitude': latitude, 'longitude': longitude, 'timezone': timezone}
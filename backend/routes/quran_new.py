@@ -1,7 +1,63 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify
+from utils.quran_corpus import CorpusUnavailable, UnknownEdition, quran_corpus
+from functools import wraps
 
 quran_bp = Blueprint('quran', __name__)
 
+# The text never changes between corpus builds
+CACHE_CONTROL = 'public, max-age=86400'
+
+def corpus_response(f):
+    """Serve ``f``'s result as JSON, mapping corpus errors to HTTP errors"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            result = f(*args, **kwargs)
+        except CorpusUnavailable as e:
+            return jsonify({'error': str(e)}), 503
+        except UnknownEdition as e:
+            return jsonify({'error': f'Unknown edition: {e.args[0]}'}), 404
+        
+        if result is None:
+            return jsonify({'error': 'Not found'}), 404
+        response = jsonify(result)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return decorated_function
+
 @quran_bp.route('/test', methods=['GET'])
 def test():
-    return jsonify({'message': 'Quran endpoint working', 'status': 'success'})
\ No newline at end of file
+    return jsonify({'message': 'Quran endpoint working', 'status': 'success'})
+
+@quran_bp.route('/editions', methods=['GET'])
+@corpus_response
+def get_editions():
+    return {'editions': quran_corpus.editions()}
+
+@quran_bp.route('/surahs', methods=['GET'])
+@corpus_response
+def get_surahs():
+    return {'surahs': quran_corpus.surahs()}
+
+@quran_bp.route('/surah/<int:number>', methods=['GET'])
+@corpus_response
+def get_surah(number):
+    """A whole surah; ``?edition=`` picks the text (default: the corpus's first)"""
+    return quran_corpus.surah(number, request.args.get('edition'))
+
+@quran_bp.route('/surah/<int:number>/<int:first>-<int:last>', methods=['GET'])
+@corpus_response
+def get_ayah_range(number, first, last):
+    """Ayahs ``first`` to ``last`` of a surah, inclusive"""
+    return quran_corpus.ayah_range(number, first, last, request.args.get('edition'))
+
+@quran_bp.route('/juz/<int:number>', methods=['GET'])
+@corpus_response
+def get_juz(number):
+    return quran_corpus.juz(number, request.args.get('edition'))
+
+@quran_bp.route('/page/<int:number>', methods=['GET'])
+@corpus_response
+def get_page(number):
+    """One page of the Madani mushaf"""
+    return quran_corpus.page(number, request.args.get('edition'))
@@ -0,0 +1,97 @@
+from flask import Blueprint, current_app, request, jsonify
+from database import db
+from models.tasbeh_count import TasbehCount
+from models.user_phrase import UserPhrase
+from models.user_preference import UserPreference
+from models.user_location import UserLocation
+from models.user_reading_stats import UserReadingStats
+from models.user_achievement import UserAchievement
+from models.sync_tombstone import SyncTombstone
+from utils import require_auth
+from datetime import datetime, timedelta
+import base64
+
+sync_bp = Blueprint('sync', __name__)
+
+# Section name -> (model, change timestamp column)
+SYNC_SOURCES = {
+    'tasbeh_counts': (TasbehCount, TasbehCount.last_updated),
+    'phrases': (UserPhrase, UserPhrase.updated_at),
+    'preferences': (UserPreference, UserPreference.updated_at),
+    'location': (UserLocation, UserLocation.updated_at),
+    'reading_stats': (UserReadingStats, UserReadingStats.updated_at),
+    'achievements': (UserAchievement, UserAchievement.updated_at)
+}
+
+# How tombstone keys are typed in responses (rows are keyed by phrase text or id)
+TOMBSTONE_KEYS = {
+    'tasbeh_counts': str,
+    'phrases': int
+}
+
+def encode_sync_token(moment):
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode().rstrip('=')
+
+def decode_sync_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        return datetime.fromisoformat(base64.urlsafe_b64decode(padded).decode())
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid sync token') from e
+
+@sync_bp.route('', methods=['GET'])
+@require_auth
+def sync(current_user):
+    """Rows changed and deleted since ``?since=<token>``
+    
+    Without a token (or with one older than the tombstone retention) the
+    response is a full snapshot with ``full: true`` and the client should
+    replace its state. Rows stamped shortly before the token are sent again
+    to cover transactions that committed late, so applying changes must be
+    idempotent; apply ``deleted`` before ``changes`` (a row may have been
+    deleted and re-created). Pass ``next_token`` as ``since`` on the next
+    call.
+    """
+    try:
+        now = datetime.utcnow()
+        overlap = timedelta(seconds=current_app.config.get('SYNC_OVERLAP_SECONDS', 10))
+        retention = timedelta(days=current_app.config.get('SYNC_TOMBSTONE_DAYS', 30))
+        
+        since = None
+        token = request.args.get('since')
+        if token:
+            try:
+                since = decode_sync_token(token)
+            except ValueError:
+                return jsonify({'error': 'Invalid sync token'}), 400
+            if since < now - retention:
+                # Tombstones this old may be pruned; fall back to a snapshot
+                since = None
+        
+        changes = {}
+        for section, (model, changed_at) in SYNC_SOURCES.items():
+            query = model.query.filter(model.user_id == current_user.id)
+            if since is not None:
+                query = query.filter(changed_at >= since - overlap)
+            changes[section] = [row.to_dict() for row in query.all()]
+        
+        deleted = {section: [] for section in TOMBSTONE_KEYS}
+        if since is not None:
+            tombstones = SyncTombstone.query.filter(
+                SyncTombstone.user_id == current_user.id,
+                SyncTombstone.deleted_at >= since - overlap
+            ).order_by(SyncTombstone.deleted_at).all()
+            for tombstone in tombstones:
+                key_type = TOMBSTONE_KEYS.get(tombstone.entity, str)
+                deleted.setdefault(tombstone.entity, []).append(key_type(tombstone.entity_key))
+        
+        return jsonify({
+            'full': since is None,
+            'changes': changes,
+            'deleted': deleted,
+            'next_token': encode_sync_token(now)
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,138 +1,389 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
 from database import db
 from models.user import User
+from utils import load_user, require_auth
 from models.tasbeh_count import TasbehCount
-from datetime import datetime
+from models.tasbeh_device import TasbehDevice
+from models.tasbeh_device_counter import TasbehDeviceCounter
+from models.sync_tombstone import SyncTombstone
+from models.tasbeh_history import TasbehHourlyBucket, TasbehDailyBucket
+from models.user_location import UserLocation
+from models.user_preference import UserPreference
+from utils.counter_store import get_counter_store
+from utils.etag import bump_user_version, user_etag
+from utils.phrase_catalog import phrase_catalog
+from utils.tasbeh_buffer import tasbeh_buffer
+from utils.user_summary import counter_removed
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import csv
+import io
+import json
 
 tasbeh_bp = Blueprint('tasbeh', __name__)
 
-# Islamic phrases for Tasbeh
-ISLAMIC_PHRASES = [
-    "سبحان الله",  # SubhanAllah
-    "الحمد لله",   # Alhamdulillah
-    "الله أكبر",   # Allahu Akbar
-    "لا إله إلا الله",  # La ilaha illa Allah
-    "اللهم صل على سيدنا محمد",  # Allahumma salli ala sayyidina Muhammad
-    "أستغفر الله",  # Astaghfirullah
-    "لا حول ولا قوة إلا بالله",  # La hawla wa la quwwata illa billah
-    "بسم الله الرحمن الرحيم"  # Bismillah ar-Rahman ar-Raheem
-]
+# Upper bound on entries accepted by /count/batch, and on a single increment
+MAX_BATCH_ENTRIES = 1000
+MAX_INCREMENT_AMOUNT = 10000
 
-@tasbeh_bp.route('/phrases', methods=['GET'])
-@jwt_required()
-def get_phrases():
-    """Get all available Islamic phrases with user's counts"""
-    try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get user's tasbeh counts
-        user_counts = {}
-        counts = TasbehCount.query.filter_by(user_id=user.id).all()
-        for count in counts:
-            user_counts[count.phrase] = count.to_dict()
-        
-        # Prepare phrases with counts
-        phrases_data = []
-        for phrase in ISLAMIC_PHRASES:
-            count_data = user_counts.get(phrase, {
-                'phrase': phrase,
+# /merge: largest cumulative counter (the count columns are INTEGER) and
+# the most one merge may add to a phrase
+MAX_DEVICE_COUNTER = 2 ** 31 - 1
+MAX_MERGE_GROWTH = 100000
+
+# Chart ranges served from the daily rollup, and the hourly window limit
+HISTORY_RANGES = (7, 30, 365)
+MAX_HOURLY_HISTORY = 168
+
+# Streaming export formats by MIME type, and rows fetched per cursor batch
+EXPORT_FORMATS = {
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'text/csv': 'csv'
+}
+EXPORT_CSV_FIELDS = ['type', 'user', 'phrase', 'count', 'day', 'last_updated']
+EXPORT_BATCH_SIZE = 1000
+
+def phrases_with_counts(user_id):
+    """Every catalog phrase with the user's count, as served by GET /phrases"""
+    # Get user's tasbeh counts
+    user_counts = {}
+    counts = TasbehCount.query.filter_by(user_id=user_id).all()
+    for count in counts:
+        user_counts[count.phrase_id] = count.to_dict()
+    
+    # Include increments still sitting in the write-behind buffer
+    if tasbeh_buffer.enabled:
+        for phrase_id, amount in tasbeh_buffer.pending_counts(user_id).items():
+            count_data = user_counts.setdefault(phrase_id, {
+                'phrase': phrase_catalog.text_for(phrase_id),
                 'count': 0,
                 'last_updated': None
             })
-            phrases_data.append(count_data)
-        
-        # Calculate total dhikr count
-        total_dhikr = sum(phrase.get('count', 0) for phrase in phrases_data)
-        
-        return jsonify({
-            'phrases': phrases_data,
-            'total_dhikr': total_dhikr
-        }), 200
+            count_data['count'] += amount
+    
+    # Prepare phrases with counts
+    phrases_data = []
+    for phrase in phrase_catalog.phrases:
+        count_data = user_counts.get(phrase_catalog.id_for(phrase), {
+            'phrase': phrase,
+            'count': 0,
+            'last_updated': None
+        })
+        phrases_data.append(count_data)
+    
+    # Calculate total dhikr count
+    total_dhikr = sum(phrase.get('count', 0) for phrase in phrases_data)
+    
+    return {
+        'phrases': phrases_data,
+        'total_dhikr': total_dhikr
+    }
+
+@tasbeh_bp.route('/phrases', methods=['GET'])
+@require_auth
+@user_etag
+def get_phrases(current_user):
+    """Get all available Islamic phrases with user's counts"""
+    try:
+        return jsonify(phrases_with_counts(current_user.id)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @tasbeh_bp.route('/count', methods=['POST'])
-@jwt_required()
-def increment_count():
+@require_auth
+def increment_count(current_user):
     """Increment count for a specific phrase"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         data = request.get_json()
         phrase = data.get('phrase', '')
         amount = data.get('amount', 1)
+        phrase_id = phrase_catalog.id_for(phrase)
         
-        if phrase not in ISLAMIC_PHRASES:
+        if phrase_id is None:
             return jsonify({'error': 'Invalid phrase'}), 400
         
-        if not isinstance(amount, int) or amount < 1:
-            return jsonify({'error': 'Amount must be a positive integer'}), 400
-        
-        # Find or create tasbeh count record
-        tasbeh_count = TasbehCount.query.filter_by(
-            user_id=user.id, 
-            phrase=phrase
-        ).first()
+        if not _is_int(amount) or not 1 <= amount <= MAX_INCREMENT_AMOUNT:
+            return jsonify({'error': f'Amount must be an integer between 1 and {MAX_INCREMENT_AMOUNT}'}), 400
         
-        if tasbeh_count:
-            tasbeh_count.count += amount
-            tasbeh_count.last_updated = datetime.utcnow()
-        else:
-            tasbeh_count = TasbehCount(
-                user_id=user.id,
-                phrase=phrase,
-                count=amount,
-                last_updated=datetime.utcnow()
-            )
-            db.session.add(tasbeh_count)
+        if tasbeh_buffer.enabled:
+            return jsonify({
+                'message': 'Count updated successfully',
+                'phrase': phrase,
+                'count': tasbeh_buffer.increment(current_user.id, phrase_id, amount)
+            }), 200
         
+        # Single atomic upsert; safe against concurrent taps from other devices
+        count = get_counter_store().increment(db.session, current_user.id, phrase_id, amount)
+        bump_user_version(current_user.id)
         db.session.commit()
         
         return jsonify({
             'message': 'Count updated successfully',
             'phrase': phrase,
-            'count': tasbeh_count.count
+            'count': count
         }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@tasbeh_bp.route('/reset', methods=['POST'])
-@jwt_required()
-def reset_count():
-    """Reset count for a specific phrase"""
+@tasbeh_bp.route('/count/batch', methods=['POST'])
+@require_auth
+def increment_count_batch(current_user):
+    """Apply a batch of increments from one device in a single transaction.
+    
+    Entries carry a per-device ``client_seq`` numbered 1, 2, 3... Sequences
+    already applied are replays and are skipped, so retrying a batch is
+    idempotent. Batches may arrive out of order: sequences up to
+    ``TasbehDevice.SEQ_WINDOW`` past the last contiguous one are applied and
+    remembered; a batch reaching further ahead is refused with 409 and
+    ``last_seq`` so the device resends from there.
+    """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
+        data = request.get_json() or {}
+        device_id = data.get('device_id')
+        entries = data.get('entries')
+        
+        if not isinstance(device_id, str) or not device_id.strip() or len(device_id) > 100:
+            return jsonify({'error': 'device_id is required'}), 400
+        
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': 'entries must be a non-empty list'}), 400
+        
+        if len(entries) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'At most {MAX_BATCH_ENTRIES} entries per batch'}), 400
+        
+        for entry in entries:
+            if not isinstance(entry, dict) or phrase_catalog.id_for(entry.get('phrase')) is None:
+                return jsonify({'error': 'Invalid phrase'}), 400
+            amount = entry.get('amount', 1)
+            if not _is_int(amount) or not 1 <= amount <= MAX_INCREMENT_AMOUNT:
+                return jsonify({'error': f'Amount must be an integer between 1 and {MAX_INCREMENT_AMOUNT}'}), 400
+            client_seq = entry.get('client_seq')
+            if not _is_int(client_seq) or client_seq < 1:
+                return jsonify({'error': 'client_seq must be a positive integer (numbered 1, 2, 3...)'}), 400
+        
+        device = _lock_device(current_user.id, device_id.strip())
+        
+        # Drop replays, including duplicates within this batch. ``window`` has
+        # bit n set when last_seq + 1 + n has been applied.
+        last_seq, window = device.last_seq, device.seq_window
+        applied = 0
+        totals = {}
+        for entry in sorted(entries, key=lambda e: e['client_seq']):
+            offset = entry['client_seq'] - last_seq - 1
+            if offset < 0 or window >> offset & 1:
+                continue
+            if offset >= TasbehDevice.SEQ_WINDOW:
+                db.session.rollback()
+                return jsonify({
+                    'error': 'client_seq is too far ahead; resend from last_seq + 1',
+                    'last_seq': device.last_seq
+                }), 409
+            window |= 1 << offset
+            while window & 1:
+                last_seq += 1
+                window >>= 1
+            applied += 1
+            phrase_id = phrase_catalog.id_for(entry['phrase'])
+            totals[phrase_id] = totals.get(phrase_id, 0) + entry.get('amount', 1)
+        
+        now = datetime.utcnow()
+        stored = get_counter_store().increment_many(db.session, [
+            {'user_id': current_user.id, 'phrase_id': phrase_id, 'count': amount}
+            for phrase_id, amount in totals.items()
+        ], now=now)
+        
+        device.last_seq, device.seq_window = last_seq, window
+        device.last_seen_at = now
+        if stored:
+            bump_user_version(current_user.id)
+        db.session.commit()
+        
+        if tasbeh_buffer.enabled:
+            tasbeh_buffer.observe(stored)
+        
+        return jsonify({
+            'message': 'Counts updated successfully',
+            'applied': applied,
+            'duplicates': len(entries) - applied,
+            'last_seq': device.last_seq,
+            'counts': {
+                phrase_catalog.text_for(phrase_id): count
+                for (_, phrase_id), count in stored.items()
+            }
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tasbeh_bp.route('/merge', methods=['POST'])
+@require_auth
+def merge_device_counters(current_user):
+    """Merge a device's cumulative per-phrase counters.
+    
+    Each device reports the total it has counted for a phrase since it was
+    installed (never the increment). The server keeps the highest value seen
+    per (device, phrase) and adds only the growth to the user's totals, so
+    uploads can be retried, duplicated or reordered without double counting.
+    A counter may grow by at most ``MAX_MERGE_GROWTH`` per merge; larger jumps
+    are refused with 400 and nothing is applied.
+    """
+    try:
+        data = request.get_json() or {}
+        device_id = data.get('device_id')
+        counters = data.get('counters')
+        
+        if not isinstance(device_id, str) or not device_id.strip() or len(device_id) > 100:
+            return jsonify({'error': 'device_id is required'}), 400
+        
+        if not isinstance(counters, list) or not counters:
+            return jsonify({'error': 'counters must be a non-empty list'}), 400
+        
+        if len(counters) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'At most {MAX_BATCH_ENTRIES} counters per merge'}), 400
+        
+        reported = {}
+        for counter in counters:
+            if not isinstance(counter, dict):
+                return jsonify({'error': 'Invalid phrase'}), 400
+            phrase_id = phrase_catalog.id_for(counter.get('phrase'))
+            if phrase_id is None:
+                return jsonify({'error': 'Invalid phrase'}), 400
+            count = counter.get('count')
+            if not _is_int(count) or not 0 <= count <= MAX_DEVICE_COUNTER:
+                return jsonify({'error': f'count must be an integer between 0 and {MAX_DEVICE_COUNTER}'}), 400
+            reported[phrase_id] = max(reported.get(phrase_id, 0), count)
+        
+        # The device lock serializes merges from the same device
+        device = _lock_device(current_user.id, device_id.strip())
+        known = {
+            counter.phrase_id: counter
+            for counter in TasbehDeviceCounter.query.filter(
+                TasbehDeviceCounter.device_id == device.id,
+                TasbehDeviceCounter.phrase_id.in_(list(reported))
+            )
+        }
+        
+        growth = {}
+        for phrase_id, count in reported.items():
+            counter = known.get(phrase_id)
+            if counter is None:
+                db.session.add(TasbehDeviceCounter(device_id=device.id, phrase_id=phrase_id, count=count))
+                growth[phrase_id] = count
+            elif count > counter.count:
+                growth[phrase_id] = count - counter.count
+                counter.count = count
+        
+        too_large = [phrase_id for phrase_id, amount in growth.items() if amount > MAX_MERGE_GROWTH]
+        if too_large:
+            db.session.rollback()
+            return jsonify({
+                'error': f'A counter may grow by at most {MAX_MERGE_GROWTH} per merge',
+                'phrases': [phrase_catalog.text_for(phrase_id) for phrase_id in too_large]
+            }), 400
+        
+        now = datetime.utcnow()
+        stored = get_counter_store().increment_many(db.session, [
+            {'user_id': current_user.id, 'phrase_id': phrase_id, 'count': amount}
+            for phrase_id, amount in growth.items() if amount > 0
+        ], now=now)
+        
+        device.last_seen_at = now
+        if stored:
+            bump_user_version(current_user.id)
+        db.session.commit()
         
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        if tasbeh_buffer.enabled:
+            tasbeh_buffer.observe(stored)
         
+        # Totals for phrases that did not grow come straight from the counters
+        totals = {phrase_id: count for (_, phrase_id), count in stored.items()}
+        unchanged = [phrase_id for phrase_id in reported if phrase_id not in totals]
+        if unchanged:
+            totals.update(db.session.query(TasbehCount.phrase_id, TasbehCount.count).filter(
+                TasbehCount.user_id == current_user.id,
+                TasbehCount.phrase_id.in_(unchanged)
+            ).all())
+        
+        return jsonify({
+            'message': 'Counters merged successfully',
+            'device_id': device.device_id,
+            'applied': {
+                phrase_catalog.text_for(phrase_id): amount
+                for phrase_id, amount in growth.items() if amount > 0
+            },
+            'counts': {
+                phrase_catalog.text_for(phrase_id): totals.get(phrase_id, 0)
+                for phrase_id in reported
+            }
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _is_int(value):
+    # JSON true/false arrive as bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _lock_device(user_id, device_id):
+    """Get or create the device row, locked until the transaction ends"""
+    device = TasbehDevice.query.filter_by(
+        user_id=user_id,
+        device_id=device_id
+    ).with_for_update().first()
+    
+    if device:
+        return device
+    
+    try:
+        with db.session.begin_nested():
+            device = TasbehDevice(user_id=user_id, device_id=device_id, last_seq=0, seq_window=0)
+            db.session.add(device)
+    except IntegrityError:
+        # Another request registered the device first
+        device = TasbehDevice.query.filter_by(
+            user_id=user_id,
+            device_id=device_id
+        ).with_for_update().first()
+    
+    return device
+
+@tasbeh_bp.route('/reset', methods=['POST'])
+@require_auth
+def reset_count(current_user):
+    """Reset count for a specific phrase"""
+    discarded = 0
+    try:
         data = request.get_json()
         phrase = data.get('phrase', '')
+        phrase_id = phrase_catalog.id_for(phrase)
         
-        if phrase not in ISLAMIC_PHRASES:
+        if phrase_id is None:
             return jsonify({'error': 'Invalid phrase'}), 400
         
+        # Buffered taps are written in the same transaction as the reset
+        if tasbeh_buffer.enabled:
+            discarded = tasbeh_buffer.discard(current_user.id, phrase_id, db.session)
+        
         # Find and delete tasbeh count record
         tasbeh_count = TasbehCount.query.filter_by(
-            user_id=user.id, 
-            phrase=phrase
+            user_id=current_user.id, 
+            phrase_id=phrase_id
         ).first()
         
         if tasbeh_count:
             db.session.delete(tasbeh_count)
+            counter_removed(tasbeh_count)
+            SyncTombstone.record(current_user.id, 'tasbeh_counts', phrase)
+            bump_user_version(current_user.id)
             db.session.commit()
         
         return jsonify({
@@ -143,21 +394,17 @@ def reset_count():
         
     except Exception as e:
         db.session.rollback()
+        if discarded:
+            tasbeh_buffer.restore(current_user.id, phrase_id, discarded)
         return jsonify({'error': str(e)}), 500
 
 @tasbeh_bp.route('/statistics', methods=['GET'])
-@jwt_required()
-def get_statistics():
+@require_auth
+def get_statistics(current_user):
     """Get user's tasbeh statistics"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         # Get all user's tasbeh counts
-        counts = TasbehCount.query.filter_by(user_id=user.id).all()
+        counts = TasbehCount.query.filter_by(user_id=current_user.id).all()
         
         total_dhikr = sum(count.count for count in counts)
         total_phrases = len(counts)
@@ -171,37 +418,178 @@ def get_statistics():
                 'count': most_recited_count.count
             }
         
-        # Recent activity (last 7 days)
-        recent_activity = []
-        for count in counts:
-            if count.last_updated:
-                days_ago = (datetime.utcnow() - count.last_updated).days
-                if days_ago <= 7:
-                    recent_activity.append(count.to_dict())
+        # Recent activity (last 7 days) from the daily rollup
+        since = datetime.utcnow().date() - timedelta(days=6)
+        recent_rows = db.session.query(
+            TasbehDailyBucket.phrase_id,
+            func.sum(TasbehDailyBucket.count)
+        ).filter(
+            TasbehDailyBucket.user_id == current_user.id,
+            TasbehDailyBucket.day >= since
+        ).group_by(TasbehDailyBucket.phrase_id).all()
+        
+        recent_activity = [
+            {'phrase': phrase_catalog.text_for(phrase_id), 'count': int(total)}
+            for phrase_id, total in recent_rows
+        ]
         
         return jsonify({
             'total_dhikr': total_dhikr,
             'total_phrases': total_phrases,
             'most_recited': most_recited,
-            'recent_activity': recent_activity
+            'recent_activity': recent_activity,
+            'recent_total': sum(item['count'] for item in recent_activity)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@tasbeh_bp.route('/goal', methods=['GET'])
+@require_auth
+def get_daily_goal(current_user):
+    """Get today's progress towards the user's daily goal"""
+    try:
+        preferences = UserPreference.query.filter_by(user_id=current_user.id).first()
+        daily_goal = preferences.daily_goal if preferences and preferences.daily_goal else 100
+        
+        # "Today" is the user's local day. Buckets are whole UTC hours, so for
+        # zones with a fractional offset the bucket containing local midnight
+        # is counted in full.
+        tz = _user_timezone(current_user.id)
+        local_now = datetime.now(tz)
+        local_midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+        since = local_midnight.astimezone(timezone.utc).replace(tzinfo=None, minute=0)
+        
+        today_count = db.session.query(
+            func.coalesce(func.sum(TasbehHourlyBucket.count), 0)
+        ).filter(
+            TasbehHourlyBucket.user_id == current_user.id,
+            TasbehHourlyBucket.bucket_start >= since
+        ).scalar()
+        
+        return jsonify({
+            'date': local_now.date().isoformat(),
+            'timezone': str(tz),
+            'daily_goal': daily_goal,
+            'today_count': int(today_count),
+            'remaining': max(daily_goal - int(today_count), 0),
+            'progress': round(min(int(today_count) / daily_goal, 1.0) * 100, 1)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasbeh_bp.route('/history', methods=['GET'])
+@require_auth
+def get_history(current_user):
+    """Get daily totals for the last 7, 30 or 365 days"""
+    try:
+        days = request.args.get('days', 7, type=int)
+        phrase = request.args.get('phrase')
+        
+        if days not in HISTORY_RANGES:
+            return jsonify({'error': f'days must be one of {list(HISTORY_RANGES)}'}), 400
+        
+        phrase_id = phrase_catalog.id_for(phrase)
+        
+        if phrase is not None and phrase_id is None:
+            return jsonify({'error': 'Invalid phrase'}), 400
+        
+        start = datetime.utcnow().date() - timedelta(days=days - 1)
+        query = db.session.query(
+            TasbehDailyBucket.day,
+            func.sum(TasbehDailyBucket.count)
+        ).filter(
+            TasbehDailyBucket.user_id == current_user.id,
+            TasbehDailyBucket.day >= start
+        )
+        if phrase_id is not None:
+            query = query.filter(TasbehDailyBucket.phrase_id == phrase_id)
+        
+        totals = {day: int(total) for day, total in query.group_by(TasbehDailyBucket.day).all()}
+        
+        history = []
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            history.append({'date': day.isoformat(), 'count': totals.get(day, 0)})
+        
+        return jsonify({
+            'days': days,
+            'phrase': phrase,
+            'history': history,
+            'total': sum(totals.values())
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasbeh_bp.route('/history/hourly', methods=['GET'])
+@require_auth
+def get_hourly_history(current_user):
+    """Get hourly totals for the last N hours (at most a week)"""
+    try:
+        hours = request.args.get('hours', 24, type=int)
+        
+        if hours < 1 or hours > MAX_HOURLY_HISTORY:
+            return jsonify({'error': f'hours must be between 1 and {MAX_HOURLY_HISTORY}'}), 400
+        
+        current_hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        start = current_hour - timedelta(hours=hours - 1)
+        rows = db.session.query(
+            TasbehHourlyBucket.bucket_start,
+            func.sum(TasbehHourlyBucket.count)
+        ).filter(
+            TasbehHourlyBucket.user_id == current_user.id,
+            TasbehHourlyBucket.bucket_start >= start
+        ).group_by(TasbehHourlyBucket.bucket_start).all()
+        
+        totals = {bucket_start: int(total) for bucket_start, total in rows}
+        
+        history = []
+        for offset in range(hours):
+            bucket_start = start + timedelta(hours=offset)
+            history.append({'hour': bucket_start.isoformat(), 'count': totals.get(bucket_start, 0)})
+        
+        return jsonify({
+            'hours': hours,
+            'history': history,
+            'total': sum(totals.values())
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _user_timezone(user_id):
+    """Timezone from the user's saved location, falling back to UTC"""
+    tz_name = db.session.query(UserLocation.timezone).filter_by(user_id=user_id).scalar()
+    if tz_name:
+        try:
+            return ZoneInfo(tz_name)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
 @tasbeh_bp.route('/export', methods=['GET'])
-@jwt_required()
-def export_data():
-    """Export user's tasbeh data"""
+@require_auth
+def export_data(current_user):
+    """Export user's tasbeh data.
+    
+    Returns a JSON document by default. ``?format=ndjson|csv`` (or an
+    ``Accept`` of ``application/x-ndjson`` / ``text/csv``) streams counts and
+    daily history row by row instead.
+    """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
+        export_format = _export_format()
+        
+        if export_format is None:
+            return jsonify({'error': 'format must be one of json, ndjson, csv'}), 400
         
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        if export_format != 'json':
+            return _stream_export(export_format, user_id=current_user.id)
         
         # Get all user's tasbeh counts
-        counts = TasbehCount.query.filter_by(user_id=user.id).all()
+        user = load_user(current_user)
+        counts = TasbehCount.query.filter_by(user_id=current_user.id).all()
         
         export_data = {
             'user': user.username,
@@ -215,6 +603,118 @@ def export_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@tasbeh_bp.route('/export/all', methods=['GET'])
+@require_auth
+def export_all_data(current_user):
+    """Stream every user's tasbeh data (admin only, NDJSON or CSV)"""
+    try:
+        if not load_user(current_user).is_admin:
+            return jsonify({'error': 'Admin access required'}), 403
+        
+        export_format = _export_format()
+        
+        if export_format is None:
+            return jsonify({'error': 'format must be one of ndjson, csv'}), 400
+        
+        # A single JSON document would have to be built in memory
+        if export_format == 'json':
+            export_format = 'ndjson'
+        
+        return _stream_export(export_format)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _export_format():
+    """Pick json, ndjson or csv from ?format= or the Accept header"""
+    requested = request.args.get('format')
+    if requested:
+        requested = requested.lower()
+        return requested if requested in EXPORT_FORMATS.values() else None
+    
+    best = request.accept_mimetypes.best_match(list(EXPORT_FORMATS))
+    return EXPORT_FORMATS.get(best, 'json')
+
+def _stream_export(export_format, user_id=None):
+    """Stream counts and daily history, one user or all users.
+    
+    Rows are read through a server-side cursor in batches of
+    ``EXPORT_BATCH_SIZE``, so memory stays flat however many rows exist.
+    """
+    counts_query = select(
+        User.username,
+        TasbehCount.phrase_id,
+        TasbehCount.count,
+        TasbehCount.last_updated
+    ).join(User, User.id == TasbehCount.user_id).order_by(
+        TasbehCount.user_id,
+        TasbehCount.phrase_id
+    )
+    history_query = select(
+        User.username,
+        TasbehDailyBucket.phrase_id,
+        TasbehDailyBucket.count,
+        TasbehDailyBucket.day
+    ).join(User, User.id == TasbehDailyBucket.user_id).order_by(
+        TasbehDailyBucket.user_id,
+        TasbehDailyBucket.day,
+        TasbehDailyBucket.phrase_id
+    )
+    if user_id is not None:
+        counts_query = counts_query.where(TasbehCount.user_id == user_id)
+        history_query = history_query.where(TasbehDailyBucket.user_id == user_id)
+    
+    def records():
+        for username, phrase_id, count, last_updated in db.session.execute(
+            counts_query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ):
+            yield {
+                'type': 'count',
+                'user': username,
+                'phrase': phrase_catalog.text_for(phrase_id),
+                'count': count,
+                'day': None,
+                'last_updated': last_updated.isoformat() if last_updated else None
+            }
+        for username, phrase_id, count, day in db.session.execute(
+            history_query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ):
+            yield {
+                'type': 'daily',
+                'user': username,
+                'phrase': phrase_catalog.text_for(phrase_id),
+                'count': count,
+                'day': day.isoformat(),
+                'last_updated': None
+            }
+    
+    def generate_ndjson():
+        for record in records():
+            yield json.dumps(record, ensure_ascii=False) + '\n'
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS)
+        writer.writeheader()
+        for record in records():
+            writer.writerow(record)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    if export_format == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    filename = f'tasbeh-export-{datetime.utcnow():%Y%m%d%H%M%S}.{export_format}'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
 # Add missing endpoints for compatibility
 @tasbeh_bp.route('/counts', methods=['GET'])
 @jwt_required()
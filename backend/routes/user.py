@@ -1,80 +1,97 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import db
 from models.user import User
+from routes.tasbeh import phrases_with_counts
+from utils import load_profile, load_user_with, load_user_with_summary, profile_dict, require_auth
 from models.user_phrase import UserPhrase
 from models.user_preference import UserPreference
 from models.user_location import UserLocation
 from models.user_reading_stats import UserReadingStats
+from models.user_summary import UserSummary
+from models.sync_tombstone import SyncTombstone
+from utils.etag import bump_user_version, user_etag
+from utils.pagination import encode_cursor, decode_cursor
+from utils.user_summary import phrase_added, phrase_removed, rebuild_summaries
 from datetime import datetime
+from sqlalchemy import tuple_
 
 user_bp = Blueprint('user', __name__)
 
+DEFAULT_PHRASES_PAGE_SIZE = 50
+MAX_PHRASES_PAGE_SIZE = 200
+
+# Sections served by /bootstrap, mirroring the endpoints a client calls on load
+BOOTSTRAP_SECTIONS = ('profile', 'preferences', 'location', 'dashboard', 'tasbeh')
+
+def dashboard_dict(user):
+    """Dashboard body for a user loaded with its summary"""
+    return {
+        'user': user.to_dict(),
+        'statistics': user.summary.to_dict(),
+        'recent_phrases': user.summary.recent_phrases
+    }
+
 @user_bp.route('/profile', methods=['GET'])
-@jwt_required()
-def get_profile():
+@require_auth
+@user_etag
+def get_profile(current_user):
     """Get user profile with all related data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get user preferences
-        preferences = UserPreference.query.filter_by(user_id=user.id).first()
+        # User, preferences, location and reading stats in one query
+        user = load_profile(current_user)
         
-        # Get user location
-        location = UserLocation.query.filter_by(user_id=user.id).first()
-        
-        # Get reading stats
-        reading_stats = UserReadingStats.query.filter_by(user_id=user.id).first()
-        
-        return jsonify({
-            'user': user.to_dict(),
-            'preferences': preferences.to_dict() if preferences else None,
-            'location': location.to_dict() if location else None,
-            'reading_stats': reading_stats.to_dict() if reading_stats else None
-        }), 200
+        return jsonify(profile_dict(user)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/phrases', methods=['GET'])
-@jwt_required()
-def get_user_phrases():
-    """Get user's custom phrases"""
+@require_auth
+def get_user_phrases(current_user):
+    """Get a page of the user's custom phrases, newest first
+    
+    Pass the returned ``next_cursor`` as ``cursor`` to get the next page.
+    """
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
+        limit = request.args.get('limit', DEFAULT_PHRASES_PAGE_SIZE, type=int)
+        cursor = request.args.get('cursor')
         
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        if limit < 1 or limit > MAX_PHRASES_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PHRASES_PAGE_SIZE}'}), 400
         
-        # Get user phrases
-        phrases = UserPhrase.query.filter_by(user_id=user.id).order_by(UserPhrase.created_at.desc()).all()
+        # Keyset pagination over idx_user_phrases_user_created
+        query = UserPhrase.query.filter_by(user_id=current_user.id)
+        if cursor:
+            try:
+                created_at, phrase_id = decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+            query = query.filter(tuple_(UserPhrase.created_at, UserPhrase.id) < tuple_(created_at, phrase_id))
         
-        phrases_data = [phrase.to_dict() for phrase in phrases]
+        phrases = query.order_by(UserPhrase.created_at.desc(), UserPhrase.id.desc()).limit(limit + 1).all()
+        
+        next_cursor = None
+        if len(phrases) > limit:
+            phrases = phrases[:limit]
+            next_cursor = encode_cursor(phrases[-1].created_at, phrases[-1].id)
+        
+        summary = db.session.get(UserSummary, current_user.id)
+        total = summary.custom_phrase_count if summary else UserPhrase.query.filter_by(user_id=current_user.id).count()
         
         return jsonify({
-            'phrases': phrases_data,
-            'total': len(phrases_data)
+            'phrases': [phrase.to_dict() for phrase in phrases],
+            'total': total,
+            'next_cursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/phrases', methods=['POST'])
-@jwt_required()
-def add_phrase():
+@require_auth
+def add_phrase(current_user):
     """Add a new custom phrase"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         data = request.get_json()
         phrase_text = data.get('phrase', '').strip()
         
@@ -83,11 +100,14 @@ def add_phrase():
         
         # Create new phrase
         phrase = UserPhrase(
-            user_id=user.id,
+            user_id=current_user.id,
             phrase=phrase_text
         )
         
         db.session.add(phrase)
+        db.session.flush()
+        phrase_added(phrase)
+        bump_user_version(current_user.id)
         db.session.commit()
         
         return jsonify({
@@ -100,26 +120,23 @@ def add_phrase():
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/phrases/<int:phrase_id>', methods=['DELETE'])
-@jwt_required()
-def delete_phrase(phrase_id):
+@require_auth
+def delete_phrase(current_user, phrase_id):
     """Delete a custom phrase"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         # Find and delete phrase
         phrase = UserPhrase.query.filter_by(
             id=phrase_id,
-            user_id=user.id
+            user_id=current_user.id
         ).first()
         
         if not phrase:
             return jsonify({'error': 'Phrase not found'}), 404
         
         db.session.delete(phrase)
+        phrase_removed(phrase)
+        SyncTombstone.record(current_user.id, 'phrases', phrase.id)
+        bump_user_version(current_user.id)
         db.session.commit()
         
         return jsonify({
@@ -131,21 +148,16 @@ def delete_phrase(phrase_id):
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/preferences', methods=['GET'])
-@jwt_required()
-def get_preferences():
+@require_auth
+@user_etag
+def get_preferences(current_user):
     """Get user preferences"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        preferences = UserPreference.query.filter_by(user_id=user.id).first()
+        preferences = UserPreference.query.filter_by(user_id=current_user.id).first()
         
         if not preferences:
             # Create default preferences
-            preferences = UserPreference(user_id=user.id)
+            preferences = UserPreference(user_id=current_user.id)
             db.session.add(preferences)
             db.session.commit()
         
@@ -157,22 +169,16 @@ def get_preferences():
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/preferences', methods=['PUT'])
-@jwt_required()
-def update_preferences():
+@require_auth
+def update_preferences(current_user):
     """Update user preferences"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         data = request.get_json()
         
-        preferences = UserPreference.query.filter_by(user_id=user.id).first()
+        preferences = UserPreference.query.filter_by(user_id=current_user.id).first()
         
         if not preferences:
-            preferences = UserPreference(user_id=user.id)
+            preferences = UserPreference(user_id=current_user.id)
             db.session.add(preferences)
         
         # Update preferences
@@ -188,6 +194,7 @@ def update_preferences():
             preferences.language_preference = data['language_preference']
         
         preferences.updated_at = datetime.utcnow()
+        bump_user_version(current_user.id)
         
         db.session.commit()
         
@@ -201,17 +208,11 @@ def update_preferences():
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/location', methods=['GET'])
-@jwt_required()
-def get_location():
+@require_auth
+def get_location(current_user):
     """Get user location"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        location = UserLocation.query.filter_by(user_id=user.id).first()
+        location = UserLocation.query.filter_by(user_id=current_user.id).first()
         
         return jsonify({
             'location': location.to_dict() if location else None
@@ -221,22 +222,16 @@ def get_location():
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/location', methods=['PUT'])
-@jwt_required()
-def update_location():
+@require_auth
+def update_location(current_user):
     """Update user location"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         data = request.get_json()
         
-        location = UserLocation.query.filter_by(user_id=user.id).first()
+        location = UserLocation.query.filter_by(user_id=current_user.id).first()
         
         if not location:
-            location = UserLocation(user_id=user.id)
+            location = UserLocation(user_id=current_user.id)
             db.session.add(location)
         
         # Update location data
@@ -252,6 +247,7 @@ def update_location():
             location.timezone = data['timezone']
         
         location.updated_at = datetime.utcnow()
+        bump_user_version(current_user.id)
         
         db.session.commit()
         
@@ -265,45 +261,80 @@ def update_location():
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/dashboard', methods=['GET'])
-@jwt_required()
-def get_dashboard():
+@require_auth
+@user_etag
+def get_dashboard(current_user):
     """Get user dashboard data"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        # Get user statistics
-        total_phrases = UserPhrase.query.filter_by(user_id=user.id).count()
-        
-        # Get tasbeh statistics
-        from models.tasbeh_count import TasbehCount
-        tasbeh_counts = TasbehCount.query.filter_by(user_id=user.id).all()
-        total_dhikr = sum(count.count for count in tasbeh_counts)
-        
-        # Get reading stats
-        reading_stats = UserReadingStats.query.filter_by(user_id=user.id).first()
-        
-        # Get recent activity (last 5 phrases)
-        recent_phrases = UserPhrase.query.filter_by(user_id=user.id).order_by(
-            UserPhrase.created_at.desc()
-        ).limit(5).all()
-        
-        dashboard_data = {
-            'user': user.to_dict(),
-            'statistics': {
-                'total_phrases': total_phrases,
-                'total_dhikr': total_dhikr,
-                'total_tasbeh_phrases': len(tasbeh_counts),
-                'quran_verses_read': reading_stats.quran_verses_read if reading_stats else 0,
-                'reading_streak': reading_stats.daily_reading_streak if reading_stats else 0
-            },
-            'recent_phrases': [phrase.to_dict() for phrase in recent_phrases]
-        }
-        
-        return jsonify(dashboard_data), 200
+        # User and precomputed summary in one primary-key read
+        user = load_user_with_summary(current_user)
+        
+        if user.summary is None:
+            # Created before summaries existed; build it once
+            rebuild_summaries([current_user.id])
+            db.session.commit()
+            user = load_user_with_summary(current_user)
+        
+        return jsonify(dashboard_dict(user)), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@user_bp.route('/bootstrap', methods=['GET'])
+@require_auth
+@user_etag
+def get_bootstrap(current_user):
+    """Everything a client loads at startup, in one round trip
+    
+    ``?include=profile,preferences,tasbeh`` selects sections; all of
+    BOOTSTRAP_SECTIONS by default. Each section has the same shape as the
+    body of the corresponding endpoint.
+    """
+    try:
+        include = request.args.get('include')
+        sections = [name.strip() for name in include.split(',') if name.strip()] if include else list(BOOTSTRAP_SECTIONS)
+        
+        unknown = [name for name in sections if name not in BOOTSTRAP_SECTIONS]
+        if unknown:
+            return jsonify({'error': f'Unknown sections: {", ".join(unknown)}; valid: {", ".join(BOOTSTRAP_SECTIONS)}'}), 400
+        
+        # One SELECT for the user and every one-to-one row the sections need
+        relationships = []
+        if 'profile' in sections:
+            relationships += [User.preferences, User.location, User.reading_stats]
+        else:
+            if 'preferences' in sections:
+                relationships.append(User.preferences)
+            if 'location' in sections:
+                relationships.append(User.location)
+        if 'dashboard' in sections:
+            relationships.append(User.summary)
+        user = load_user_with(current_user, *relationships)
+        
+        if 'preferences' in sections and user.preferences is None:
+            user.preferences = UserPreference(user_id=current_user.id)
+            db.session.commit()
+        
+        if 'dashboard' in sections and user.summary is None:
+            # Created before summaries existed; build it once
+            rebuild_summaries([current_user.id])
+            db.session.commit()
+            user = load_user_with(current_user, *relationships)
+        
+        data = {}
+        if 'profile' in sections:
+            data['profile'] = profile_dict(user)
+        if 'preferences' in sections:
+            data['preferences'] = {'preferences': user.preferences.to_dict()}
+        if 'location' in sections:
+            data['location'] = {'location': user.location.to_dict() if user.location else None}
+        if 'dashboard' in sections:
+            data['dashboard'] = dashboard_dict(user)
+        if 'tasbeh' in sections:
+            data['tasbeh'] = phrases_with_counts(current_user.id)
+        
+        return jsonify(data), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
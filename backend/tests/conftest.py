@@ -0,0 +1,46 @@
+import os
+import tempfile
+import uuid
+
+import pytest
+
+# The app is configured from the environment when ``app`` is imported.
+# Tests use a throwaway SQLite file unless TEST_DATABASE_URL points at a
+# (disposable) PostgreSQL database.
+_database_dir = tempfile.mkdtemp(prefix='islamic-app-tests-')
+os.environ['DATABASE_URL'] = os.environ.get(
+    'TEST_DATABASE_URL',
+    f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+)
+os.environ.setdefault('JWT_SECRET_KEY', 'test-jwt-secret-key-' + 'x' * 32)
+os.environ['ADMISSION_CONCURRENCY'] = ''
+os.environ['ADMISSION_AUTH_IP_RATE'] = '100000/1'
+os.environ['ADMISSION_AUTH_USER_RATE'] = '100000/1'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+from app import app as flask_app  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """Register a fresh user and return its Authorization headers."""
+    def register_user():
+        name = f'user{uuid.uuid4().hex[:12]}'
+        response = client.post('/api/auth/register', json={
+            'username': name,
+            'email': f'{name}@example.com',
+            'password': 'password123'
+        })
+        assert response.status_code == 201, response.get_json()
+        return {'Authorization': f"Bearer {response.get_json()['tokens']['access_token']}"}
+    return register_user
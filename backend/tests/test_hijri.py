@@ -0,0 +1,136 @@
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from utils.hijri import (
+    GREGORIAN_RANGE, HIJRI_RANGE, gregorian_range_to_hijri, gregorian_to_hijri,
+    hijri_month_dates, hijri_month_length, hijri_to_gregorian, is_ramadan
+)
+
+# Day 0 of the Reduced Julian Day count used by the reference table
+RJD_EPOCH = date(1858, 11, 16)
+
+# Months where the reference table and ours (hijridate) disagree by a day,
+# with the start we keep. ICU's islamic-umalqura calendar sides with ours
+# for 1427 and 1446; 1485 is a prediction either way.
+REFERENCE_DIFFERENCES = {
+    (1427, 6): date(2006, 6, 27),
+    (1446, 6): date(2024, 12, 2),
+    (1485, 10): date(2063, 1, 30),
+}
+
+
+def reference_month_starts():
+    """``{(year, month): date}`` from tests/data/ummalqura_van_gent.txt"""
+    starts = {}
+    path = Path(__file__).parent / 'data' / 'ummalqura_van_gent.txt'
+    for line in path.read_text().splitlines():
+        if line.startswith('#'):
+            continue
+        year, *days = map(int, line.split())
+        for month, day in enumerate(days, 1):
+            starts[year, month] = RJD_EPOCH + timedelta(days=day)
+    return starts
+
+
+# Umm al-Qura dates announced in Saudi Arabia
+ANCHORS = [
+    ((1445, 9, 1), date(2024, 3, 11)),
+    ((1445, 10, 1), date(2024, 4, 10)),
+    ((1445, 12, 10), date(2024, 6, 16)),
+    ((1446, 1, 1), date(2024, 7, 7)),
+    ((1446, 9, 1), date(2025, 3, 1)),
+    ((1447, 9, 1), date(2026, 2, 18)),
+]
+
+
+@pytest.mark.parametrize('hijri, gregorian', ANCHORS, ids=['%d-%02d-%02d' % hijri for hijri, _ in ANCHORS])
+def test_known_dates(hijri, gregorian):
+    assert hijri_to_gregorian(*hijri) == gregorian
+    assert gregorian_to_hijri(gregorian) == hijri
+    assert gregorian_to_hijri(datetime.combine(gregorian, datetime.min.time())) == hijri
+
+
+def test_ramadan_1445():
+    start, days = hijri_month_dates(1445, 9)
+    assert (start, days) == (date(2024, 3, 11), hijri_month_length(1445, 9))
+    assert not is_ramadan(start - timedelta(days=1))
+    assert all(is_ramadan(start + timedelta(days=n)) for n in range(days))
+    assert not is_ramadan(start + timedelta(days=days))
+
+
+def test_month_starts_match_reference_table():
+    reference = reference_month_starts()
+    assert len(reference) == (1500 - 1356 + 1) * 12 + 1
+    
+    differences = {}
+    months = sorted(reference)
+    for (year, month), following in zip(months, months[1:]):
+        start = hijri_to_gregorian(year, month, 1)
+        if start != reference[year, month]:
+            differences[year, month] = start
+        length = (reference[following] - reference[year, month]).days
+        if (year, month) not in differences and following not in REFERENCE_DIFFERENCES:
+            assert hijri_month_length(year, month) == length, (year, month)
+    assert differences == REFERENCE_DIFFERENCES
+
+
+def test_every_day_matches_reference_table():
+    reference = {**reference_month_starts(), **REFERENCE_DIFFERENCES}
+    months = sorted(reference)
+    for (year, month), following in zip(months, months[1:]):
+        first = reference[year, month]
+        for offset in range((reference[following] - first).days):
+            day = first + timedelta(days=offset)
+            assert gregorian_to_hijri(day) == (year, month, offset + 1), day
+            assert hijri_to_gregorian(year, month, offset + 1) == day
+
+
+def test_round_trip_over_the_whole_range():
+    # Includes 1343-1355 AH, which the reference table does not cover
+    first, last = GREGORIAN_RANGE
+    day, previous = first, None
+    while day <= last:
+        hijri = gregorian_to_hijri(day)
+        assert hijri_to_gregorian(*hijri) == day
+        if previous is not None:
+            # Consecutive days either advance the day or start a new month
+            year, month, hijri_day = previous
+            assert hijri in ((year, month, hijri_day + 1), (year + month // 12, month % 12 + 1, 1))
+        day, previous = day + timedelta(days=1), hijri
+    assert gregorian_to_hijri(first) == HIJRI_RANGE[0]
+    assert gregorian_to_hijri(last) == HIJRI_RANGE[1]
+
+
+def test_range_conversion_matches_single_days():
+    start = date(2024, 1, 1)
+    days = gregorian_range_to_hijri(start, 800)
+    assert days == [gregorian_to_hijri(start + timedelta(days=n)) for n in range(800)]
+
+
+@pytest.mark.parametrize('day', [GREGORIAN_RANGE[0] - timedelta(days=1), GREGORIAN_RANGE[1] + timedelta(days=1)])
+def test_gregorian_out_of_range(day):
+    with pytest.raises(ValueError):
+        gregorian_to_hijri(day)
+    with pytest.raises(ValueError):
+        gregorian_range_to_hijri(day, 1)
+    assert not is_ramadan(day)
+
+
+def test_range_running_past_the_end():
+    with pytest.raises(ValueError):
+        gregorian_range_to_hijri(GREGORIAN_RANGE[1] - timedelta(days=5), 10)
+
+
+@pytest.mark.parametrize('year, month, day', [
+    (HIJRI_RANGE[0][0] - 1, 12, 1),
+    (HIJRI_RANGE[1][0] + 1, 1, 1),
+    (1445, 0, 1),
+    (1445, 13, 1),
+    (1445, 9, 0),
+    (1445, 9, 31),
+])
+def test_invalid_hijri_dates(year, month, day):
+    with pytest.raises(ValueError):
+        hijri_to_gregorian(year, month, day)
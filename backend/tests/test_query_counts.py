@@ -0,0 +1,76 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from database import db
+
+
+@pytest.fixture
+def count_selects(app):
+    """Context manager collecting the SELECTs this thread sends to the database."""
+    @contextmanager
+    def counter():
+        with app.app_context():
+            engine = db.engine
+        thread = threading.get_ident()
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            # Background flushers share the engine; only count this request
+            if threading.get_ident() == thread and statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+        
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return counter
+
+
+@pytest.fixture
+def user_headers(client, register):
+    headers = register()
+    # Resolves the identity and runs the first revocation sync, both of
+    # which are cached for later requests
+    assert client.get('/api/auth/profile', headers=headers).status_code == 200
+    return headers
+
+
+def test_profile_is_one_select(client, user_headers, count_selects):
+    with count_selects() as statements:
+        response = client.get('/api/auth/profile', headers=user_headers)
+    
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'user', 'preferences', 'location', 'reading_stats'}
+    assert len(statements) == 1, statements
+
+
+def test_user_profile_is_version_check_plus_one_select(client, user_headers, count_selects):
+    with count_selects() as statements:
+        response = client.get('/api/user/profile', headers=user_headers)
+    
+    assert response.status_code == 200
+    assert len(statements) == 2, statements
+    
+    with count_selects() as statements:
+        response = client.get('/api/user/profile', headers=dict(user_headers, **{
+            'If-None-Match': response.headers['ETag']
+        }))
+    
+    assert response.status_code == 304
+    assert len(statements) == 1, statements
+
+
+def test_dashboard_is_version_check_plus_one_select(client, user_headers, count_selects):
+    # Builds the summary row if registration did not
+    assert client.get('/api/user/dashboard', headers=user_headers).status_code == 200
+    
+    with count_selects() as statements:
+        response = client.get('/api/user/dashboard', headers=user_headers)
+    
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'user', 'statistics', 'recent_phrases'}
+    assert len(statements) == 2, statements
@@ -0,0 +1,34 @@
+import threading
+
+PHRASE = 'سبحان الله'
+THREADS = 8
+TAPS_PER_THREAD = 100
+
+
+def test_concurrent_increments_are_not_lost(app, client, register):
+    headers = register()
+    response = client.post('/api/tasbeh/count', json={'phrase': PHRASE}, headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 1
+    
+    start = threading.Barrier(THREADS)
+    failures = []
+    
+    def tap():
+        thread_client = app.test_client()
+        start.wait()
+        for _ in range(TAPS_PER_THREAD):
+            response = thread_client.post('/api/tasbeh/count', json={'phrase': PHRASE}, headers=headers)
+            if response.status_code != 200:
+                failures.append(response.get_json())
+    
+    threads = [threading.Thread(target=tap) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert failures == []
+    phrases = client.get('/api/tasbeh/phrases', headers=headers).get_json()['phrases']
+    count = next(phrase['count'] for phrase in phrases if phrase['phrase'] == PHRASE)
+    assert count == 1 + THREADS * TAPS_PER_THREAD
@@ -1,7 +1,20 @@
+from collections import namedtuple
 from functools import wraps
-from flask import jsonify, request
+from flask import g, has_app_context, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from backend.models.user import User
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
+from database import db
+from models.user import User
+from utils.cache import TTLCache
+
+# What protected handlers need to know about the caller without loading the row
+CurrentUser = namedtuple('CurrentUser', ['id', 'public_id', 'is_active'])
+
+# JWT identity -> CurrentUser, shared by all requests in this process.
+# Sized and timed by init_user_cache(); the TTL bounds how long another
+# worker's deactivation can go unnoticed here.
+_user_cache = TTLCache(maxsize=10000, ttl=60)
 
 def handle_errors(f):
     """Decorator to handle common API errors"""
@@ -15,23 +28,95 @@ def handle_errors(f):
             return jsonify({'error': 'Internal server error'}), 500
     return decorated_function
 
+def init_user_cache(app):
+    """Apply AUTH_USER_CACHE_SIZE / AUTH_USER_CACHE_TTL from the app config"""
+    _user_cache.configure(
+        maxsize=app.config.get('AUTH_USER_CACHE_SIZE'),
+        ttl=app.config.get('AUTH_USER_CACHE_TTL')
+    )
+
 def get_current_user():
-    """Get current user from JWT token"""
-    try:
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(public_id=current_user_id).first()
-        return user
-    except:
+    """Resolve the JWT identity to a CurrentUser, or None if it doesn't exist.
+    
+    Cached on ``g`` for the rest of the request and in a bounded TTL/LRU cache
+    across requests, so most authenticated requests resolve without a query.
+    Handlers that need the full row use ``load_user``.
+    """
+    public_id = get_jwt_identity()
+    if public_id is None:
         return None
+    
+    current_user = g.get('current_user')
+    if current_user is not None and current_user.public_id == public_id:
+        return current_user
+    
+    current_user = _user_cache.get(public_id)
+    if current_user is None:
+        row = db.session.query(User.id, User.is_active, User.data_version).filter_by(public_id=public_id).first()
+        if row is None:
+            return None
+        current_user = CurrentUser(row.id, public_id, row.is_active)
+        _user_cache.set(public_id, current_user)
+        # Fresh for this request; lets user_etag skip its own lookup
+        g.current_user_version = row.data_version
+    
+    g.current_user = current_user
+    return current_user
+
+def load_user(current_user):
+    """Load the full User row for a resolved CurrentUser"""
+    return db.session.get(User, current_user.id)
+
+def load_user_with(current_user, *relationships):
+    """Load the User row and the given one-to-one relationships in one SELECT"""
+    return db.session.get(
+        User,
+        current_user.id,
+        options=[joinedload(relationship) for relationship in relationships],
+        populate_existing=True
+    )
+
+def load_profile(current_user):
+    """Load the User row with preferences, location and reading stats in one SELECT"""
+    return load_user_with(current_user, User.preferences, User.location, User.reading_stats)
+
+def load_user_with_summary(current_user):
+    """Load the User row joined with its UserSummary in one SELECT"""
+    return load_user_with(current_user, User.summary)
+
+def profile_dict(user):
+    """Serialize a user loaded by load_profile() with its one-to-one children"""
+    return {
+        'user': user.to_dict(),
+        'preferences': user.preferences.to_dict() if user.preferences else None,
+        'location': user.location.to_dict() if user.location else None,
+        'reading_stats': user.reading_stats.to_dict() if user.reading_stats else None
+    }
+
+def invalidate_current_user(public_id):
+    """Drop a user from the identity cache after changing their account"""
+    _user_cache.pop(public_id)
+    if not has_app_context():
+        return
+    current_user = g.get('current_user')
+    if current_user is not None and current_user.public_id == public_id:
+        g.pop('current_user')
+
+@event.listens_for(User.is_active, 'set')
+def _invalidate_on_deactivation(target, value, oldvalue, initiator):
+    if target.public_id and value != oldvalue:
+        _user_cache.pop(target.public_id)
 
 def require_auth(f):
-    """Decorator to require authentication and get current user"""
+    """Decorator to require authentication and pass the CurrentUser"""
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
         current_user = get_current_user()
         if not current_user:
             return jsonify({'error': 'User not found'}), 404
+        if not current_user.is_active:
+            return jsonify({'error': 'Account is deactivated'}), 403
         return f(current_user, *args, **kwargs)
     return decorated_function
 
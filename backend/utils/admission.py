@@ -0,0 +1,180 @@
+import math
+import threading
+import time
+
+from flask import g, jsonify, request
+from flask_jwt_extended import decode_token
+
+from utils.cache import TTLCache
+
+
+def parse_limits(value):
+    """Parse ``"auth=2,user=4"`` into ``{'auth': 2, 'user': 4}``."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        name, _, limit = item.partition('=')
+        limits[name.strip()] = int(limit)
+    return limits
+
+
+def parse_rate(value):
+    """Parse ``"10/60"`` (10 requests per 60 seconds) into ``(10, 60.0)``."""
+    count, _, seconds = value.partition('/')
+    return int(count), float(seconds or 1)
+
+
+class TokenBucket:
+    """Token bucket holding up to ``capacity`` tokens, refilled at ``rate``/second."""
+    
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated_at')
+    
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def take(self):
+        """Take one token; returns 0 on success or the seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+    
+    def refill_time(self):
+        """Seconds until the bucket is full again, as of its last update."""
+        return (self.capacity - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-blueprint load shedding, run before every request.
+    
+    Each blueprint listed in ``ADMISSION_CONCURRENCY`` may have at most that
+    many requests in flight per worker process; extra requests get an
+    immediate 503 instead of queueing behind slow ones. Requests to the
+    ``auth`` blueprint also draw from token buckets per client IP
+    (``ADMISSION_AUTH_IP_RATE``) and per user (``ADMISSION_AUTH_USER_RATE``;
+    the token identity, or the submitted username when logging in) and get
+    429 when a bucket is empty. Both carry ``Retry-After``.
+    
+    Limits are per process, so they only bite when gunicorn runs several
+    threads per worker.
+    """
+    
+    rate_limited_blueprints = ('auth',)
+    
+    def __init__(self, app=None):
+        self.concurrency = {}
+        self.ip_rate = None
+        self.user_rate = None
+        self.proxy_count = 0
+        
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._buckets = TTLCache(maxsize=100000)
+        self._stats = {}
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.concurrency = parse_limits(app.config.get('ADMISSION_CONCURRENCY', ''))
+        self.ip_rate = parse_rate(app.config['ADMISSION_AUTH_IP_RATE']) if app.config.get('ADMISSION_AUTH_IP_RATE') else None
+        self.user_rate = parse_rate(app.config['ADMISSION_AUTH_USER_RATE']) if app.config.get('ADMISSION_AUTH_USER_RATE') else None
+        self.proxy_count = app.config.get('ADMISSION_PROXY_COUNT', 0)
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in self.concurrency.items()}
+        
+        app.extensions['admission'] = self
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+    
+    def stats(self):
+        """Counters per blueprint since this process started."""
+        with self._lock:
+            return {
+                name: dict(counters, limit=self.concurrency.get(name))
+                for name, counters in self._stats.items()
+            }
+    
+    def _admit(self):
+        blueprint = request.blueprint
+        if blueprint is None or request.method == 'OPTIONS':
+            return None
+        
+        if blueprint in self.rate_limited_blueprints:
+            retry_after = self._take_tokens(blueprint)
+            if retry_after:
+                self._count(blueprint, 'rate_limited')
+                return self._reject(429, 'Too many requests', retry_after)
+        
+        slots = self._slots.get(blueprint)
+        if slots is not None:
+            if not slots.acquire(blocking=False):
+                self._count(blueprint, 'shed')
+                return self._reject(503, 'Server busy, please retry', 1)
+            g.admission_slot = slots
+        
+        self._count(blueprint, 'admitted')
+        return None
+    
+    def _release(self, exc=None):
+        slots = g.pop('admission_slot', None)
+        if slots is not None:
+            slots.release()
+    
+    def _take_tokens(self, blueprint):
+        keys = []
+        if self.ip_rate:
+            keys.append((f'{blueprint}:ip:{self._client_ip()}', self.ip_rate))
+        if self.user_rate:
+            user = self._user_key()
+            if user:
+                keys.append((f'{blueprint}:user:{user}', self.user_rate))
+        
+        retry_after = 0
+        with self._lock:
+            for key, (count, seconds) in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(count, count / seconds)
+                retry_after = max(retry_after, bucket.take())
+                # Forgetting a bucket hands out a full one, so keep it
+                # until it would have refilled anyway
+                self._buckets.set(key, bucket, ttl=bucket.refill_time())
+        return retry_after
+    
+    def _client_ip(self):
+        if self.proxy_count:
+            route = request.access_route
+            if len(route) >= self.proxy_count:
+                return route[-self.proxy_count]
+        return request.remote_addr
+    
+    def _user_key(self):
+        auth_header = request.headers.get('Authorization', '')
+        if auth_header.startswith('Bearer '):
+            try:
+                return decode_token(auth_header[7:], allow_expired=True)['sub']
+            except Exception:
+                return None
+        data = request.get_json(silent=True)
+        if isinstance(data, dict) and isinstance(data.get('username'), str):
+            return data['username'].strip().casefold() or None
+        return None
+    
+    def _count(self, blueprint, counter):
+        with self._lock:
+            counters = self._stats.setdefault(blueprint, {'admitted': 0, 'shed': 0, 'rate_limited': 0})
+            counters[counter] += 1
+    
+    def _reject(self, status, message, retry_after):
+        response = jsonify({'error': message})
+        response.status_code = status
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+
+admission = AdmissionController()
@@ -0,0 +1,42 @@
+import os
+import threading
+
+
+class PeriodicFlusher:
+    """Base for in-process write-behind queues.
+    
+    Subclasses implement ``flush``. ``start_flusher`` lazily starts a daemon
+    thread that calls it every ``flush_interval`` seconds; ``shutdown`` stops
+    the thread and flushes what is left.
+    """
+    
+    flusher_name = 'flusher'
+    flush_interval = 2.0
+    
+    def __init__(self):
+        self._flusher_lock = threading.Lock()
+        self._flusher_pid = None
+        self._stop = threading.Event()
+    
+    def flush(self):
+        raise NotImplementedError
+    
+    def shutdown(self):
+        self._stop.set()
+        self.flush()
+    
+    def start_flusher(self):
+        # Started lazily so that each forked gunicorn worker gets its own thread
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+            thread = threading.Thread(target=self._run, name=self.flusher_name, daemon=True)
+            thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,152 @@
+from datetime import datetime
+
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import db
+from models.tasbeh_count import TasbehCount
+from models.tasbeh_history import TasbehHourlyBucket, TasbehDailyBucket
+from models.user_summary import UserSummary
+
+
+class CounterStore:
+    """Atomic tasbeh counter increments.
+    
+    Every increment is a single ``INSERT ... ON CONFLICT (user_id, phrase_id)
+    DO UPDATE SET count = count + :n RETURNING count`` statement, so concurrent
+    taps from several devices never lose updates and the first insert for a
+    phrase cannot race on the ``unique_user_phrase`` constraint. Subclasses
+    only choose the dialect-specific ``insert`` construct.
+    
+    The hourly and daily history buckets and the per-user summary row are
+    bumped by the same amounts in the same transaction, so rollups never
+    drift from the totals. A missing summary row is rebuilt from the source
+    tables rather than started from the increment.
+    
+    ``executor`` is anything with ``execute``: the session, or a Connection
+    when writing outside a request.
+    """
+    
+    insert = None
+    
+    def increment(self, executor, user_id, phrase_id, amount, now=None):
+        """Add ``amount`` to one counter and return the new count."""
+        counts = self.increment_many(executor, [
+            {'user_id': user_id, 'phrase_id': phrase_id, 'count': amount}
+        ], now=now)
+        return counts[(user_id, phrase_id)]
+    
+    def increment_many(self, executor, rows, now=None):
+        """Apply several increments in one multi-row upsert.
+        
+        ``rows`` are dicts with user_id, phrase_id and count (the amount to
+        add); each (user_id, phrase_id) may appear only once. Returns
+        ``{(user_id, phrase_id): new_count}``.
+        """
+        if not rows:
+            return {}
+        
+        now = now or datetime.utcnow()
+        table = TasbehCount.__table__
+        stmt = self.insert(table).values([
+            {
+                'user_id': row['user_id'],
+                'phrase_id': row['phrase_id'],
+                'count': row['count'],
+                'last_updated': now
+            }
+            for row in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.phrase_id],
+            set_={
+                'count': table.c.count + stmt.excluded.count,
+                'last_updated': stmt.excluded.last_updated
+            }
+        ).returning(table.c.user_id, table.c.phrase_id, table.c.count)
+        
+        counts = {(row.user_id, row.phrase_id): row.count for row in executor.execute(stmt)}
+        
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        self._add_to_buckets(executor, TasbehHourlyBucket.__table__, 'bucket_start', hour, rows)
+        self._add_to_buckets(executor, TasbehDailyBucket.__table__, 'day', now.date(), rows)
+        self._add_to_summary(executor, rows, counts, now)
+        
+        return counts
+    
+    def _add_to_buckets(self, executor, table, bucket_column, bucket, rows):
+        stmt = self.insert(table).values([
+            {
+                'user_id': row['user_id'],
+                bucket_column: bucket,
+                'phrase_id': row['phrase_id'],
+                'count': row['count']
+            }
+            for row in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c[bucket_column], table.c.phrase_id],
+            set_={'count': table.c.count + stmt.excluded.count}
+        )
+        executor.execute(stmt)
+    
+    def _add_to_summary(self, executor, rows, counts, now):
+        totals = {}  # user_id -> [dhikr added, counters created]
+        for row in rows:
+            total = totals.setdefault(row['user_id'], [0, 0])
+            total[0] += row['count']
+            # The stored count equals the amount added only for a new counter row
+            if counts[(row['user_id'], row['phrase_id'])] == row['count']:
+                total[1] += 1
+        
+        missing = set(totals) - self._update_summaries(executor, totals, now)
+        if missing:
+            # Users without a row (created before summaries existed) get one
+            # built from the source tables, which already include this write.
+            # A row another transaction created meanwhile did not see it.
+            from utils.user_summary import rebuild_summaries
+            written = rebuild_summaries(missing, executor)
+            self._update_summaries(executor, {
+                user_id: totals[user_id] for user_id in missing - written
+            }, now)
+    
+    def _update_summaries(self, executor, totals, now):
+        """Add ``{user_id: [dhikr, counters created]}``; returns the user ids updated."""
+        if not totals:
+            return set()
+        table = UserSummary.__table__
+        # One statement for every user: the amounts are picked per row
+        dhikr = case({user_id: amounts[0] for user_id, amounts in totals.items()}, value=table.c.user_id)
+        created = case({user_id: amounts[1] for user_id, amounts in totals.items()}, value=table.c.user_id)
+        stmt = table.update().where(table.c.user_id.in_(list(totals))).values(
+            total_dhikr=table.c.total_dhikr + dhikr,
+            tasbeh_phrase_count=table.c.tasbeh_phrase_count + created,
+            last_activity_at=now,
+            updated_at=now
+        ).returning(table.c.user_id)
+        return set(executor.execute(stmt).scalars())
+
+
+class PostgresCounterStore(CounterStore):
+    insert = staticmethod(postgresql.insert)
+
+
+class SQLiteCounterStore(CounterStore):
+    """Requires SQLite 3.35+ for ``RETURNING``."""
+    
+    insert = staticmethod(sqlite.insert)
+
+
+_STORES = {
+    'postgresql': PostgresCounterStore(),
+    'sqlite': SQLiteCounterStore()
+}
+
+
+def get_counter_store():
+    """Return the counter store for the configured database"""
+    dialect = db.engine.dialect.name
+    try:
+        return _STORES[dialect]
+    except KeyError:
+        raise RuntimeError(f'No counter store for database: {dialect}')
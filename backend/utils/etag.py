@@ -0,0 +1,69 @@
+import hashlib
+from functools import wraps
+
+from flask import g, make_response, request
+from sqlalchemy import inspect
+from sqlalchemy.orm.util import identity_key
+
+from database import db
+from models.user import User
+from utils import get_current_user
+
+
+def bump_user_version(*user_ids):
+    """Invalidate ETags for the given users; call inside the write transaction."""
+    if not user_ids:
+        return
+    db.session.query(User).filter(User.id.in_(user_ids)).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+
+
+def current_data_version(current_user):
+    """The caller's data_version, reusing what this request already loaded.
+    
+    That is the value read while resolving the JWT identity, or a User row in
+    the session whose attributes have not expired; only otherwise is the
+    version fetched with a primary-key lookup.
+    """
+    version = g.get('current_user_version')
+    if version is not None:
+        return version
+    
+    user = db.session.identity_map.get(identity_key(User, current_user.id))
+    if user is not None and 'data_version' not in inspect(user).unloaded:
+        return user.data_version
+    
+    return db.session.query(User.data_version).filter_by(id=current_user.id).scalar()
+
+
+def user_etag(f):
+    """Serve a weak ETag derived from the user's data_version.
+    
+    A matching ``If-None-Match`` is answered with 304 before the view runs
+    any of its own queries, at the cost of at most one primary-key lookup of
+    the version (none when resolving the identity already read it). Must be
+    applied below ``require_auth``.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        current_user = get_current_user()
+        version = current_data_version(current_user)
+        
+        if version is None:
+            return f(*args, **kwargs)
+        
+        etag = hashlib.blake2s(f'{current_user.public_id}:{version}'.encode(), digest_size=8).hexdigest()
+        
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return decorated_function
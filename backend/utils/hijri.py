@@ -0,0 +1,137 @@
+"""Gregorian <-> Hijri (Umm al-Qura) conversion without network calls.
+
+Month starts come from ``utils.ummalqura``. Both directions are array
+lookups: Hijri -> Gregorian indexes the month-start table directly, and
+Gregorian -> Hijri reads the month index of the day from a per-day table
+built once at import (about 56k days, 112 KB).
+"""
+from array import array
+from datetime import date as date_cls, datetime, timedelta
+
+from utils.ummalqura import FIRST_YEAR, LAST_YEAR, MONTH_STARTS
+
+# Reduced Julian Day + this = proleptic Gregorian ordinal (date.toordinal())
+RJD_TO_ORDINAL = 678575
+
+FIRST_ORDINAL = MONTH_STARTS[0] + RJD_TO_ORDINAL
+END_ORDINAL = MONTH_STARTS[-1] + RJD_TO_ORDINAL  # exclusive
+
+GREGORIAN_RANGE = (date_cls.fromordinal(FIRST_ORDINAL), date_cls.fromordinal(END_ORDINAL - 1))
+HIJRI_RANGE = ((FIRST_YEAR, 1, 1), (LAST_YEAR, 12, MONTH_STARTS[-1] - MONTH_STARTS[-2]))
+
+MONTH_NAMES = (
+    'Muḥarram', 'Ṣafar', 'Rabīʿ al-awwal', 'Rabīʿ al-thānī', 'Jumādá al-ūlá', 'Jumādá al-ākhirah',
+    'Rajab', 'Shaʿbān', 'Ramaḍān', 'Shawwāl', 'Dhū al-Qaʿdah', 'Dhū al-Ḥijjah'
+)
+MONTH_NAMES_AR = (
+    'مُحَرَّم', 'صَفَر', 'رَبيع الأوَّل', 'رَبيع الثاني', 'جُمادى الأولى', 'جُمادى الآخرة',
+    'رَجَب', 'شَعْبان', 'رَمَضان', 'شَوّال', 'ذوالقعدة', 'ذوالحجة'
+)
+# Indexed by date.weekday() (Monday first)
+WEEKDAY_NAMES = ('Al Athnayn', 'Al Thalaata', "Al Arba'a", 'Al Khamees', "Al Juma'a", 'Al Sabt', 'Al Ahad')
+WEEKDAY_NAMES_AR = ('الاثنين', 'الثلاثاء', 'الاربعاء', 'الخميس', 'الجمعة', 'السبت', 'الاحد')
+
+RAMADAN = 9
+
+# Month index (into MONTH_STARTS) of every supported day
+_DAY_MONTHS = array('H')
+for _index in range(len(MONTH_STARTS) - 1):
+    _DAY_MONTHS.extend([_index] * (MONTH_STARTS[_index + 1] - MONTH_STARTS[_index]))
+del _index
+
+
+def gregorian_to_hijri(day):
+    """``(year, month, day)`` in the Hijri calendar for a Gregorian date.
+    
+    Raises ValueError outside ``GREGORIAN_RANGE``.
+    """
+    offset = _ordinal(day) - FIRST_ORDINAL
+    if not 0 <= offset < len(_DAY_MONTHS):
+        raise ValueError(f'Date out of supported range: {day}')
+    index = _DAY_MONTHS[offset]
+    return (
+        FIRST_YEAR + index // 12,
+        index % 12 + 1,
+        offset + FIRST_ORDINAL - MONTH_STARTS[index] - RJD_TO_ORDINAL + 1
+    )
+
+
+def hijri_to_gregorian(year, month, day):
+    """Gregorian ``date`` of a Hijri date; raises ValueError if it does not exist."""
+    index = _month_index(year, month)
+    if not 1 <= day <= MONTH_STARTS[index + 1] - MONTH_STARTS[index]:
+        raise ValueError(f'Invalid day for {year}-{month:02d}: {day}')
+    return date_cls.fromordinal(MONTH_STARTS[index] + RJD_TO_ORDINAL + day - 1)
+
+
+def hijri_month_length(year, month):
+    index = _month_index(year, month)
+    return MONTH_STARTS[index + 1] - MONTH_STARTS[index]
+
+
+def gregorian_range_to_hijri(start, days):
+    """Hijri ``(year, month, day)`` for ``days`` consecutive dates from ``start``.
+    
+    Walks the month table once instead of looking up every day.
+    """
+    if days <= 0:
+        return []
+    gregorian_to_hijri(start)
+    offset = _ordinal(start) - FIRST_ORDINAL
+    if offset + days > len(_DAY_MONTHS):
+        raise ValueError(f'Date out of supported range: {start + timedelta(days=days - 1)}')
+    
+    result = []
+    index = _DAY_MONTHS[offset]
+    ordinal = offset + FIRST_ORDINAL
+    end = ordinal + days
+    while ordinal < end:
+        month_start = MONTH_STARTS[index] + RJD_TO_ORDINAL
+        month_end = min(MONTH_STARTS[index + 1] + RJD_TO_ORDINAL, end)
+        year, month = FIRST_YEAR + index // 12, index % 12 + 1
+        result.extend((year, month, ordinal - month_start + day) for day in range(1, month_end - ordinal + 1))
+        ordinal = month_end
+        index += 1
+    return result
+
+
+def hijri_month_dates(year, month):
+    """First Gregorian date and length of a Hijri month, for calendar views."""
+    index = _month_index(year, month)
+    return (
+        date_cls.fromordinal(MONTH_STARTS[index] + RJD_TO_ORDINAL),
+        MONTH_STARTS[index + 1] - MONTH_STARTS[index]
+    )
+
+
+def is_ramadan(day):
+    """Whether a Gregorian date falls in Ramadan (False outside the supported range)."""
+    offset = _ordinal(day) - FIRST_ORDINAL
+    return 0 <= offset < len(_DAY_MONTHS) and _DAY_MONTHS[offset] % 12 == RAMADAN - 1
+
+
+def hijri_date_dict(day):
+    """Hijri date of ``day`` in the shape the aladhan gToH call returned."""
+    year, month, hijri_day = gregorian_to_hijri(day)
+    weekday = (_ordinal(day) - 1) % 7  # date.weekday()
+    return {
+        'day': f'{hijri_day:02d}',
+        'month': MONTH_NAMES[month - 1],
+        'month_ar': MONTH_NAMES_AR[month - 1],
+        'month_number': month,
+        'year': str(year),
+        'weekday': WEEKDAY_NAMES[weekday],
+        'weekday_ar': WEEKDAY_NAMES_AR[weekday]
+    }
+
+
+def _month_index(year, month):
+    if not FIRST_YEAR <= year <= LAST_YEAR or not 1 <= month <= 12:
+        raise ValueError(f'Hijri month out of supported range: {year}-{month}')
+    return (year - FIRST_YEAR) * 12 + month - 1
+
+
+def _ordinal(day):
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.toordinal()
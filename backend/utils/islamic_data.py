@@ -1,50 +1,41 @@
-import requests
 from datetime import datetime
 import math
 import os
 
+from utils.hijri import hijri_date_dict
+from utils.prayer_times import (
+    DEFAULT_METHOD, PRAYERS, compute_prayer_times, format_time, local_today, utc_offset_hours
+)
+from utils.quran_corpus import quran_corpus
+
 class IslamicDataService:
-    """Service for fetching Islamic data from external APIs"""
+    """Service for Islamic data (prayer times, Hijri dates and Quran text, all served locally)"""
     
     @staticmethod
-    def get_prayer_times(latitude, longitude, date=None):
-        """Get prayer times for a specific location"""
+    def get_prayer_times(latitude, longitude, date=None, method=DEFAULT_METHOD, asr='standard', timezone=None):
+        """Get prayer times for a specific location
+        
+        Computed locally (Umm Al-Qura by default, as the aladhan call used);
+        times are local to ``timezone``, an IANA name that is required.
+        """
         try:
             if not date:
-                date = datetime.now()
+                date = local_today(timezone)
+            elif isinstance(date, datetime):
+                date = date.date()
             
-            formatted_date = f"{date.day:02d}-{date.month:02d}-{date.year}"
-            url = f"http://api.aladhan.com/v1/timings/{formatted_date}"
+            offset = utc_offset_hours(date, timezone)
+            times = compute_prayer_times(latitude, longitude, date, offset, method=method, asr=asr)
             
-            params = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'method': 4  # Umm Al-Qura method
+            return {
+                'success': True,
+                'prayer_times': {
+                    prayer: format_time(times[prayer])
+                    for prayer in PRAYERS
+                },
+                'date': date.strftime('%d %b %Y'),
+                'location': f"({latitude:.2f}, {longitude:.2f})"
             }
-            
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                timings = data['data']['timings']
-                
-                return {
-                    'success': True,
-                    'prayer_times': {
-                        'fajr': timings['Fajr'],
-                        'dhuhr': timings['Dhuhr'],
-                        'asr': timings['Asr'],
-                        'maghrib': timings['Maghrib'],
-                        'isha': timings['Isha']
-                    },
-                    'date': data['data']['date']['readable'],
-                    'location': f"({latitude:.2f}, {longitude:.2f})"
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Unable to fetch prayer times'
-                }
                 
         except Exception as e:
             return {
@@ -53,38 +44,13 @@ class IslamicDataService:
             }
     
     @staticmethod
-    def get_islamic_date():
-        """Get current Islamic date"""
+    def get_islamic_date(date=None):
+        """Get the Islamic (Umm Al-Qura) date, today by default"""
         try:
-            url = "http://api.aladhan.com/v1/gToH"
-            today = datetime.now()
-            
-            params = {
-                'date': f"{today.day:02d}-{today.month:02d}-{today.year}"
+            return {
+                'success': True,
+                'islamic_date': hijri_date_dict(date or datetime.now().date())
             }
-            
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                hijri = data['data']['hijri']
-                
-                return {
-                    'success': True,
-                    'islamic_date': {
-                        'day': hijri['day'],
-                        'month': hijri['month']['en'],
-                        'month_ar': hijri['month']['ar'],
-                        'year': hijri['year'],
-                        'weekday': hijri['weekday']['en'],
-                        'weekday_ar': hijri['weekday']['ar']
-                    }
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Unable to fetch Islamic date'
-                }
                 
         except Exception as e:
             return {
@@ -93,23 +59,19 @@ class IslamicDataService:
             }
     
     @staticmethod
-    def get_quran_surah(surah_number):
-        """Get Quran surah from API"""
+    def get_quran_surah(surah_number, edition=None):
+        """Get a Quran surah from the local corpus"""
         try:
-            url = f"http://api.alquran.cloud/v1/surah/{surah_number}/ar.alafasy"
-            response = requests.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'success': True,
-                    'surah': data['data']
-                }
-            else:
+            surah = quran_corpus.surah(surah_number, edition)
+            if surah is None:
                 return {
                     'success': False,
                     'error': 'Unable to fetch surah'
                 }
+            return {
+                'success': True,
+                'surah': surah
+            }
                 
         except Exception as e:
             return {
@@ -0,0 +1,76 @@
+import atexit
+import threading
+
+from sqlalchemy import bindparam
+
+from database import db
+from models.user import User
+from utils.background import PeriodicFlusher
+
+
+class LastLoginQueue(PeriodicFlusher):
+    """Coalesces ``users.last_login_at`` writes off the login path.
+    
+    ``touch`` only records the newest login time per user in memory; the
+    flusher thread writes them as one batched UPDATE every
+    ``LAST_LOGIN_FLUSH_INTERVAL`` seconds and at worker shutdown, bumping
+    each user's ``data_version`` in the same statement.
+    """
+    
+    flusher_name = 'last-login-flusher'
+    
+    def __init__(self, app=None):
+        super().__init__()
+        self.app = None
+        self._lock = threading.Lock()
+        self._pending = {}  # user_id -> latest login time
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('LAST_LOGIN_FLUSH_INTERVAL', 5.0)
+        app.extensions['last_login_queue'] = self
+        atexit.register(self.shutdown)
+    
+    def touch(self, user_id, when):
+        self.start_flusher()
+        with self._lock:
+            previous = self._pending.get(user_id)
+            if previous is None or when > previous:
+                self._pending[user_id] = when
+    
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+        
+        users = User.__table__
+        stmt = (
+            users.update()
+            .where(users.c.id == bindparam('b_user_id'))
+            .values(
+                last_login_at=bindparam('b_last_login_at'),
+                data_version=users.c.data_version + 1
+            )
+        )
+        
+        try:
+            with self.app.app_context():
+                with db.engine.begin() as connection:
+                    connection.execute(stmt, [
+                        {'b_user_id': user_id, 'b_last_login_at': when}
+                        for user_id, when in batch.items()
+                    ])
+        except Exception:
+            self.app.logger.exception('Last login flush failed, will retry')
+            with self._lock:
+                for user_id, when in batch.items():
+                    # A newer login may have been queued meanwhile
+                    if user_id not in self._pending or when > self._pending[user_id]:
+                        self._pending[user_id] = when
+
+
+last_login_queue = LastLoginQueue()
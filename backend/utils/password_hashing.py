@@ -0,0 +1,113 @@
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when too many hashes are already queued; callers answer 503."""
+
+
+class PasswordHasher:
+    """Runs password KDFs in a dedicated process pool.
+    
+    Keeps hashing CPU off the web worker threads and caps it independently of
+    the number of web workers. At most ``PASSWORD_HASH_MAX_PENDING`` hashes may
+    be running or queued per web worker; beyond that ``HashingPoolSaturated``
+    is raised immediately instead of letting requests pile up. Set
+    ``PASSWORD_HASH_WORKERS`` to 0 to hash inline.
+    """
+    
+    def __init__(self, app=None):
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 1
+        self.max_pending = 4
+        self.timeout = 30
+        
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_pid = None
+        self._method_prefix = None
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD', self.method)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING', self.max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._method_prefix = None
+        app.extensions['password_hasher'] = self
+        atexit.register(self.shutdown)
+    
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+    
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+    
+    def hash_many(self, passwords):
+        """Hash a list of passwords across the whole pool (bulk imports)."""
+        if not self.workers:
+            return [generate_password_hash(password, self.method) for password in passwords]
+        methods = [self.method] * len(passwords)
+        return list(self._get_executor().map(generate_password_hash, passwords, methods, chunksize=16))
+    
+    def needs_rehash(self, pwhash):
+        """True if ``pwhash`` was made with other parameters than the configured ones."""
+        return pwhash.split('$', 1)[0] != self._configured_prefix()
+    
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+    
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # A timed-out hash keeps running in the pool, so its slot is only
+        # freed once the job itself finishes
+        future.add_done_callback(lambda _: slots.release())
+        return future.result(timeout=self.timeout)
+    
+    def _get_executor(self):
+        # Created lazily so each forked web worker owns its pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                    self._executor_pid = os.getpid()
+        return self._executor
+    
+    def _configured_prefix(self):
+        # werkzeug fills in defaults ("scrypt" -> "scrypt:32768:8:1"), so
+        # derive the canonical prefix from a real hash once
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+
+def _pool_context():
+    # The pool starts inside threaded web workers; forking those could copy
+    # locks held by other threads into the children, so start pool
+    # processes from a clean server process (or fresh interpreters)
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,74 @@
+import threading
+from types import MappingProxyType
+
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from models.tasbeh_phrase import TasbehPhrase
+from utils.islamic_data import ISLAMIC_PHRASES
+
+
+class PhraseCatalog:
+    """Process-wide, read-only mapping between tasbeh phrase text and ID.
+    
+    Loaded once from ``tasbeh_phrases`` (seeding any missing entries from
+    ``ISLAMIC_PHRASES``, whose position defines the ID) and then served from
+    immutable dicts, so validating and translating a phrase is an O(1) lookup
+    with no query.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_text = None
+        self._by_id = None
+        self._phrases = ()
+    
+    def load(self):
+        """Load the catalog if this process has not done so yet."""
+        if self._by_text is not None:
+            return
+        with self._lock:
+            if self._by_text is not None:
+                return
+            
+            self._seed()
+            rows = TasbehPhrase.query.order_by(TasbehPhrase.id).all()
+            self._by_id = MappingProxyType({row.id: row.text for row in rows})
+            self._phrases = tuple(self._by_id.values())
+            self._by_text = MappingProxyType({row.text: row.id for row in rows})
+    
+    @property
+    def phrases(self):
+        """Phrase texts in display order"""
+        self.load()
+        return self._phrases
+    
+    def id_for(self, text):
+        """ID for a phrase text, or None if it is not in the catalog"""
+        self.load()
+        if not isinstance(text, str):
+            return None
+        return self._by_text.get(text)
+    
+    def text_for(self, phrase_id):
+        self.load()
+        return self._by_id.get(phrase_id)
+    
+    def _seed(self):
+        existing = {row.id for row in TasbehPhrase.query.all()}
+        missing = [
+            TasbehPhrase(id=position, text=text)
+            for position, text in enumerate(ISLAMIC_PHRASES, start=1)
+            if position not in existing
+        ]
+        if not missing:
+            return
+        try:
+            db.session.add_all(missing)
+            db.session.commit()
+        except IntegrityError:
+            # Another worker seeded the catalog first
+            db.session.rollback()
+
+
+phrase_catalog = PhraseCatalog()
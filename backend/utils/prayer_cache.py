@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as time_of_day, timedelta
+
+from utils.cache import TTLCache
+from utils.islamic_data import IslamicDataService
+from utils.prayer_times import DEFAULT_METHOD, local_today, resolve_asr, resolve_method, resolve_timezone
+
+
+class PrayerTimesCache:
+    """Cache in front of ``IslamicDataService.get_prayer_times``.
+    
+    Coordinates are snapped to a ``PRAYER_CACHE_GRID`` degree grid and the
+    times computed for the cell centre, so everyone in the same
+    neighbourhood shares one entry per local date, method, Asr setting and
+    timezone. Entries expire at the location's local midnight.
+    
+    The in-process tier is an LRU of ``PRAYER_CACHE_SIZE`` entries. Setting
+    ``PRAYER_CACHE_PATH`` adds a SQLite file shared by all workers on the
+    host, which also survives restarts. When a calculation fails, the most
+    recent entry for the cell (even an expired one) is served with
+    ``stale: true`` instead of an error.
+    """
+    
+    # Disk rows kept this long past expiry as stale fallbacks
+    stale_retention = 2 * 24 * 3600
+    prune_every = 1000
+    
+    def __init__(self, app=None):
+        self.app = None
+        self.grid = 0.01
+        self.path = None
+        self._memory = TTLCache(maxsize=10000)
+        self._latest = TTLCache(maxsize=10000, ttl=self.stale_retention)  # cell -> last good result
+        self._local = threading.local()
+        self._writes = 0
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.grid = app.config.get('PRAYER_CACHE_GRID', self.grid)
+        self.path = app.config.get('PRAYER_CACHE_PATH') or None
+        size = app.config.get('PRAYER_CACHE_SIZE', 10000)
+        self._memory.configure(maxsize=size)
+        self._latest.configure(maxsize=size)
+        app.extensions['prayer_cache'] = self
+    
+    def get_prayer_times(self, latitude, longitude, date=None, method=DEFAULT_METHOD, asr='standard', timezone=None):
+        """Same arguments and result shape as ``IslamicDataService.get_prayer_times``."""
+        try:
+            method = resolve_method(method)
+            asr_factor = resolve_asr(asr)
+            zone = resolve_timezone(timezone)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+        
+        if not date:
+            date = local_today(timezone)
+        elif isinstance(date, datetime):
+            date = date.date()
+        cell_latitude, cell_longitude = self._snap(latitude), self._snap(longitude)
+        cell = f'{cell_latitude:.6f}:{cell_longitude:.6f}:{method}:{asr_factor}:{timezone}'
+        key = f'{cell}:{date.isoformat()}'
+        location = f"({latitude:.2f}, {longitude:.2f})"
+        
+        result = self._memory.get(key)
+        if result is None:
+            result, expires_at = self._disk_get(key)
+            if result is not None:
+                self._memory.set(key, result, ttl=expires_at - time.time())
+        if result is not None:
+            return dict(result, location=location)
+        
+        result = IslamicDataService.get_prayer_times(
+            cell_latitude, cell_longitude, date=date, method=method, asr=asr, timezone=timezone
+        )
+        if not result['success']:
+            stale = self._latest.get(cell) or self._disk_latest(cell)
+            if stale is None:
+                return result
+            return dict(stale, location=location, stale=True)
+        
+        result = {name: value for name, value in result.items() if name != 'location'}
+        expires_at = self._local_midnight(date, zone)
+        ttl = expires_at - time.time()
+        if ttl > 0:
+            self._memory.set(key, result, ttl=ttl)
+            self._disk_set(key, cell, result, expires_at)
+        self._latest.set(cell, result)
+        return dict(result, location=location)
+    
+    def clear(self):
+        self._memory.clear()
+        self._latest.clear()
+    
+    def _snap(self, degrees):
+        return round(degrees / self.grid) * self.grid
+    
+    @staticmethod
+    def _local_midnight(date, zone):
+        """Unix time of the midnight that ends ``date`` in ``zone``."""
+        following = datetime.combine(date + timedelta(days=1), time_of_day())
+        return following.replace(tzinfo=zone).timestamp()
+    
+    def _connection(self):
+        # One connection per thread and process; SQLite handles the
+        # locking between workers
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        connection = sqlite3.connect(self.path, timeout=1)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS prayer_times ('
+            'key TEXT PRIMARY KEY, cell TEXT NOT NULL, expires_at REAL NOT NULL, payload TEXT NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_prayer_times_cell ON prayer_times(cell, expires_at)')
+        connection.commit()
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+    
+    def _disk_get(self, key):
+        if not self.path:
+            return None, None
+        try:
+            row = self._connection().execute(
+                'SELECT payload, expires_at FROM prayer_times WHERE key = ? AND expires_at > ?',
+                (key, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            self.app.logger.exception('Prayer time disk cache read failed')
+            return None, None
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+    
+    def _disk_latest(self, cell):
+        if not self.path:
+            return None
+        try:
+            row = self._connection().execute(
+                'SELECT payload FROM prayer_times WHERE cell = ? ORDER BY expires_at DESC LIMIT 1',
+                (cell,)
+            ).fetchone()
+        except sqlite3.Error:
+            self.app.logger.exception('Prayer time disk cache read failed')
+            return None
+        return json.loads(row[0]) if row else None
+    
+    def _disk_set(self, key, cell, result, expires_at):
+        if not self.path:
+            return
+        try:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO prayer_times (key, cell, expires_at, payload) VALUES (?, ?, ?, ?)',
+                    (key, cell, expires_at, json.dumps(result))
+                )
+                self._writes += 1
+                if self._writes % self.prune_every == 0:
+                    connection.execute(
+                        'DELETE FROM prayer_times WHERE expires_at < ?',
+                        (time.time() - self.stale_retention,)
+                    )
+        except sqlite3.Error:
+            self.app.logger.exception('Prayer time disk cache write failed')
+
+
+prayer_cache = PrayerTimesCache()
@@ -0,0 +1,198 @@
+"""Vectorized prayer-time calendars.
+
+The same algorithm as ``utils.prayer_times.compute_prayer_times``, run with
+NumPy over a whole grid of locations x dates at once. Results agree with
+the scalar version to well under a second.
+"""
+from datetime import date as date_cls
+
+import numpy as np
+
+from utils.hijri import is_ramadan
+from utils.prayer_times import (
+    CALCULATION_METHODS, DEFAULT_METHOD, HIGH_LATITUDE_RULES, RISE_SET_ANGLE,
+    resolve_asr, resolve_method, utc_offset_hours
+)
+
+EVENTS = ('fajr', 'sunrise', 'dhuhr', 'asr', 'sunset', 'maghrib', 'isha')
+
+# Locations computed per block; bounds the temporaries to a few MB per
+# event and date
+LOCATION_BLOCK = 1024
+
+# Julian day of 1970-01-01 00:00 UTC
+UNIX_EPOCH_JD = 2440587.5
+
+# ``HH:MM`` for every minute of the day, indexed by minute
+CLOCK_LABELS = np.array([f'{m // 60:02d}:{m % 60:02d}' for m in range(24 * 60)], dtype=object)
+
+
+def compute_calendar(latitudes, longitudes, days, utc_offsets, method=DEFAULT_METHOD,
+                     asr='standard', high_latitude='AngleBased'):
+    """Prayer times for every location x date, as hours since local midnight.
+    
+    ``latitudes``/``longitudes`` are 1-D sequences of equal length L and
+    ``days`` a sequence of D dates; ``utc_offsets`` (hours) must broadcast
+    to (L, D), so a scalar, a per-date (D,) array or a per-location (L, 1)
+    array all work. Returns ``{event: float64 array of shape (L, D)}`` for
+    every name in ``EVENTS``, NaN where the event does not happen.
+    """
+    params = CALCULATION_METHODS[resolve_method(method)]
+    asr_factor = resolve_asr(asr)
+    if high_latitude not in HIGH_LATITUDE_RULES:
+        raise ValueError(f'Unknown high latitude rule: {high_latitude}')
+    
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))[:, None]
+    lng = np.asarray(longitudes, dtype=np.float64)[:, None]
+    jd = julian_days(days)[None, :] - lng / 360
+    
+    # The sun's position only depends on the guessed time of day, so each
+    # distinct guess is evaluated once for all events that share it
+    positions = {}
+    
+    def sun_position(portion):
+        if portion not in positions:
+            positions[portion] = _sun_position(jd + portion)
+        return positions[portion]
+    
+    def mid_day(portion):
+        return np.mod(12 - sun_position(portion)[1], 24)
+    
+    def sun_angle_time(angle, portion, before_noon=False):
+        decl = sun_position(portion)[0]
+        cos_t = (-np.sin(np.radians(angle)) - np.sin(decl) * np.sin(lat)) / (np.cos(decl) * np.cos(lat))
+        with np.errstate(invalid='ignore'):
+            t = np.degrees(np.arccos(cos_t)) / 15
+        noon = mid_day(portion)
+        return noon - t if before_noon else noon + t
+    
+    def asr_time(portion):
+        decl = sun_position(portion)[0]
+        angle = -np.degrees(np.arctan(1 / (asr_factor + np.tan(np.abs(lat - decl)))))
+        return sun_angle_time(angle, portion)
+    
+    nan = np.full(jd.shape, np.nan)
+    times = {
+        'fajr': sun_angle_time(params['fajr'], 5 / 24, before_noon=True),
+        'sunrise': sun_angle_time(RISE_SET_ANGLE, 6 / 24, before_noon=True),
+        'dhuhr': mid_day(12 / 24),
+        'asr': asr_time(13 / 24),
+        'sunset': sun_angle_time(RISE_SET_ANGLE, 18 / 24),
+        'maghrib': sun_angle_time(params['maghrib'], 18 / 24) if 'maghrib' in params else nan,
+        'isha': sun_angle_time(params['isha'], 18 / 24) if 'isha' in params else nan
+    }
+    
+    shift = np.asarray(utc_offsets, dtype=np.float64) - lng / 15
+    for name in times:
+        times[name] = times[name] + shift
+    
+    if high_latitude != 'None':
+        _adjust_high_latitudes(times, params, high_latitude)
+    
+    if 'maghrib' not in params:
+        times['maghrib'] = times['sunset']
+    if 'isha_minutes' in params:
+        minutes = np.full(jd.shape[1], params['isha_minutes'], dtype=np.float64)
+        if 'isha_minutes_ramadan' in params:
+            ramadan = [is_ramadan(day) for day in np.asarray(days, dtype='datetime64[D]').tolist()]
+            minutes[ramadan] = params['isha_minutes_ramadan']
+        times['isha'] = times['maghrib'] + minutes / 60
+    return times
+
+
+def prayer_calendar(latitudes, longitudes, start, days, timezones, method=DEFAULT_METHOD,
+                    asr='standard', high_latitude='AngleBased'):
+    """Columnar calendar for ``days`` consecutive dates from ``start``.
+    
+    ``timezones`` is one IANA name per location; a missing or unknown name
+    raises ValueError, as in ``utc_offset_hours``. Returns
+    ``{'date': datetime64[D] array (D,), event: float64 array (L, D), ...}``
+    with times as hours since local midnight; see ``format_times``.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    dates = np.arange(np.datetime64(start, 'D'), np.datetime64(start, 'D') + days)
+    offsets = utc_offsets(dates, timezones)
+    
+    calendar = {'date': dates}
+    calendar.update({name: np.empty((len(latitudes), days)) for name in EVENTS})
+    for first in range(0, len(latitudes), LOCATION_BLOCK):
+        block = slice(first, first + LOCATION_BLOCK)
+        times = compute_calendar(
+            latitudes[block], longitudes[block], dates, offsets[block],
+            method=method, asr=asr, high_latitude=high_latitude
+        )
+        for name in EVENTS:
+            calendar[name][block] = times[name]
+    return calendar
+
+
+def utc_offsets(dates, timezones):
+    """UTC offsets (hours) shaped (locations, dates), one zone lookup per distinct zone and date."""
+    days = [date_cls.fromisoformat(str(day)) for day in dates]
+    zones = np.asarray(timezones, dtype=object)
+    offsets = np.empty((len(zones), len(days)))
+    for zone in set(zones.tolist()):
+        offsets[zones == zone] = [utc_offset_hours(day, zone) for day in days]
+    return offsets
+
+
+def julian_days(days):
+    """Julian day at 00:00 UTC for each date (anything ``datetime64[D]`` accepts)."""
+    unix_days = np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+    return unix_days + UNIX_EPOCH_JD
+
+
+def format_times(hours):
+    """``HH:MM`` strings (rounded to the minute) for an array of hours; None for NaN."""
+    hours = np.asarray(hours, dtype=np.float64)
+    missing = np.isnan(hours)
+    minutes = np.floor(np.mod(np.where(missing, 0, hours) + 0.5 / 60, 24) * 60).astype(np.int64)
+    result = CLOCK_LABELS[minutes]
+    result[missing] = None
+    return result
+
+
+def month_dates(year, month):
+    """First date and length of a Gregorian month."""
+    start = date_cls(year, month, 1)
+    following = date_cls(year + month // 12, month % 12 + 1, 1)
+    return start, (following - start).days
+
+
+def year_dates(year):
+    """First date and length of a Gregorian year."""
+    start = date_cls(year, 1, 1)
+    return start, (date_cls(year + 1, 1, 1) - start).days
+
+
+def _adjust_high_latitudes(times, params, rule):
+    night = np.mod(times['sunrise'] - times['sunset'], 24)
+    
+    def adjust(value, base, angle, before_base):
+        portion = {'AngleBased': angle / 60, 'OneSeventh': 1 / 7}.get(rule, 1 / 2) * night
+        gap = np.mod(base - value, 24) if before_base else np.mod(value - base, 24)
+        with np.errstate(invalid='ignore'):
+            replace = np.isnan(value) | (gap > portion)
+        return np.where(replace, base - portion if before_base else base + portion, value)
+    
+    times['fajr'] = adjust(times['fajr'], times['sunrise'], params['fajr'], True)
+    if 'isha' in params:
+        times['isha'] = adjust(times['isha'], times['sunset'], params['isha'], False)
+    if 'maghrib' in params:
+        times['maghrib'] = adjust(times['maghrib'], times['sunset'], params['maghrib'], False)
+
+
+def _sun_position(jd):
+    """Declination (radians) and equation of time (hours) for an array of Julian days."""
+    d = jd - 2451545.0
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = np.mod(280.459 + 0.98564736 * d, 360)
+    ecliptic_longitude = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    obliquity = np.radians(23.439 - 0.00000036 * d)
+    
+    sin_longitude = np.sin(ecliptic_longitude)
+    right_ascension = np.degrees(np.arctan2(np.cos(obliquity) * sin_longitude, np.cos(ecliptic_longitude))) / 15
+    equation_of_time = q / 15 - np.mod(right_ascension, 24)
+    declination = np.arcsin(np.sin(obliquity) * sin_longitude)
+    return declination, equation_of_time
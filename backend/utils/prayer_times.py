@@ -0,0 +1,228 @@
+"""Local prayer-time calculation.
+
+A port of the PrayTimes.org solar-position algorithm (the one aladhan.com
+uses), so given the location's IANA timezone results match the hosted API
+to the minute without a network round trip. All times are hours since
+local midnight until formatted.
+"""
+import math
+from datetime import date as date_cls, datetime, time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from utils.hijri import is_ramadan
+
+# Angles are degrees below the horizon; ``*_minutes`` are fixed offsets
+# after the previous event instead of an angle (``*_ramadan`` during
+# Ramadan).
+CALCULATION_METHODS = {
+    'MWL': {'name': 'Muslim World League', 'fajr': 18, 'isha': 17},
+    'ISNA': {'name': 'Islamic Society of North America', 'fajr': 15, 'isha': 15},
+    'Egypt': {'name': 'Egyptian General Authority of Survey', 'fajr': 19.5, 'isha': 17.5},
+    'Makkah': {'name': 'Umm Al-Qura University, Makkah', 'fajr': 18.5, 'isha_minutes': 90, 'isha_minutes_ramadan': 120},
+    'Karachi': {'name': 'University of Islamic Sciences, Karachi', 'fajr': 18, 'isha': 18},
+    'Tehran': {'name': 'Institute of Geophysics, University of Tehran', 'fajr': 17.7, 'isha': 14, 'maghrib': 4.5},
+    'Jafari': {'name': 'Shia Ithna-Ashari, Leva Institute, Qum', 'fajr': 16, 'isha': 14, 'maghrib': 4},
+    'Gulf': {'name': 'Gulf Region', 'fajr': 19.5, 'isha_minutes': 90},
+    'Kuwait': {'name': 'Kuwait', 'fajr': 18, 'isha': 17.5},
+    'Qatar': {'name': 'Qatar', 'fajr': 18, 'isha_minutes': 90},
+    'Singapore': {'name': 'Majlis Ugama Islam Singapura', 'fajr': 20, 'isha': 18},
+    'France': {'name': 'Union Organization Islamic de France', 'fajr': 12, 'isha': 12},
+    'Turkey': {'name': 'Diyanet Isleri Baskanligi, Turkey', 'fajr': 18, 'isha': 17},
+    'Russia': {'name': 'Spiritual Administration of Muslims of Russia', 'fajr': 16, 'isha': 15}
+}
+
+# aladhan.com ``method`` ids, accepted wherever a method name is
+METHOD_IDS = {
+    0: 'Jafari', 1: 'Karachi', 2: 'ISNA', 3: 'MWL', 4: 'Makkah', 5: 'Egypt',
+    7: 'Tehran', 8: 'Gulf', 9: 'Kuwait', 10: 'Qatar', 11: 'Singapore',
+    12: 'France', 13: 'Turkey', 14: 'Russia'
+}
+
+DEFAULT_METHOD = 'Makkah'
+
+# Shadow length factor for Asr
+ASR_FACTORS = {
+    'standard': 1,  # Shafi'i, Maliki, Hanbali
+    'hanafi': 2
+}
+
+HIGH_LATITUDE_RULES = ('AngleBased', 'MiddleOfTheNight', 'OneSeventh', 'None')
+
+PRAYERS = ('fajr', 'dhuhr', 'asr', 'maghrib', 'isha')
+
+# Sun's apparent radius plus refraction at sunrise and sunset
+RISE_SET_ANGLE = 0.833
+
+
+def resolve_method(method):
+    """Return the method name for a name (case-insensitive) or aladhan id."""
+    if method is None:
+        return DEFAULT_METHOD
+    if isinstance(method, str) and method.strip().isdigit():
+        method = int(method)
+    if isinstance(method, int):
+        if method not in METHOD_IDS:
+            raise ValueError(f'Unknown calculation method: {method}')
+        return METHOD_IDS[method]
+    for name in CALCULATION_METHODS:
+        if name.lower() == str(method).strip().lower():
+            return name
+    raise ValueError(f'Unknown calculation method: {method}')
+
+
+def resolve_asr(asr):
+    """Return the Asr shadow factor for ``standard``/``shafi`` or ``hanafi``."""
+    key = (asr or 'standard').strip().lower()
+    if key == 'shafi':
+        key = 'standard'
+    if key not in ASR_FACTORS:
+        raise ValueError(f'Unknown Asr method: {asr}')
+    return ASR_FACTORS[key]
+
+
+def resolve_timezone(timezone_name):
+    """Return the ``ZoneInfo`` for an IANA name; raises ValueError if missing or unknown.
+    
+    There is no fallback from longitude: civil time differs from the
+    nautical zone by hours in places such as China, Spain or Argentina, and
+    by half hours in India.
+    """
+    if not timezone_name:
+        raise ValueError('timezone is required (an IANA name such as Asia/Riyadh)')
+    try:
+        return ZoneInfo(timezone_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Unknown timezone: {timezone_name}')
+
+
+def utc_offset_hours(day, timezone_name):
+    """UTC offset (hours) of ``timezone_name`` in effect at local noon on ``day``."""
+    noon = datetime.combine(day, time(12), tzinfo=resolve_timezone(timezone_name))
+    return noon.utcoffset().total_seconds() / 3600
+
+
+def local_today(timezone_name):
+    """Today's date in ``timezone_name``."""
+    return datetime.now(resolve_timezone(timezone_name)).date()
+
+
+def compute_prayer_times(latitude, longitude, day, utc_offset, method=DEFAULT_METHOD,
+                         asr='standard', high_latitude='AngleBased'):
+    """Prayer times for one date and place as hours since local midnight.
+    
+    Returns a dict with ``fajr``, ``sunrise``, ``dhuhr``, ``asr``,
+    ``sunset``, ``maghrib`` and ``isha``; a value is NaN when the event
+    does not happen that day (polar day or night) and no high latitude
+    rule could place it.
+    """
+    params = CALCULATION_METHODS[resolve_method(method)]
+    asr_factor = resolve_asr(asr)
+    if high_latitude not in HIGH_LATITUDE_RULES:
+        raise ValueError(f'Unknown high latitude rule: {high_latitude}')
+    
+    jd = _julian_day(day) - longitude / (15 * 24)
+    lat = math.radians(latitude)
+    
+    def mid_day(portion):
+        return _fix_hour(12 - _sun_position(jd + portion)[1])
+    
+    def sun_angle_time(angle, portion, before_noon=False):
+        decl = _sun_position(jd + portion)[0]
+        noon = mid_day(portion)
+        cos_t = (-math.sin(math.radians(angle)) - math.sin(decl) * math.sin(lat)) / (math.cos(decl) * math.cos(lat))
+        if not -1 <= cos_t <= 1:
+            return math.nan
+        t = math.degrees(math.acos(cos_t)) / 15
+        return noon - t if before_noon else noon + t
+    
+    def asr_time(portion):
+        decl = _sun_position(jd + portion)[0]
+        angle = -math.degrees(math.atan(1 / (asr_factor + math.tan(abs(lat - decl)))))
+        return sun_angle_time(angle, portion)
+    
+    # One pass from rough guesses (as fractions of a day) is enough for
+    # minute precision
+    times = {
+        'fajr': sun_angle_time(params['fajr'], 5 / 24, before_noon=True),
+        'sunrise': sun_angle_time(RISE_SET_ANGLE, 6 / 24, before_noon=True),
+        'dhuhr': mid_day(12 / 24),
+        'asr': asr_time(13 / 24),
+        'sunset': sun_angle_time(RISE_SET_ANGLE, 18 / 24),
+        'maghrib': sun_angle_time(params['maghrib'], 18 / 24) if 'maghrib' in params else math.nan,
+        'isha': sun_angle_time(params['isha'], 18 / 24) if 'isha' in params else math.nan
+    }
+    
+    shift = utc_offset - longitude / 15
+    times = {name: value + shift for name, value in times.items()}
+    
+    if high_latitude != 'None':
+        _adjust_high_latitudes(times, params, high_latitude)
+    
+    if 'maghrib' not in params:
+        times['maghrib'] = times['sunset']
+    if 'isha_minutes' in params:
+        minutes = params['isha_minutes']
+        if 'isha_minutes_ramadan' in params and is_ramadan(day):
+            minutes = params['isha_minutes_ramadan']
+        times['isha'] = times['maghrib'] + minutes / 60
+    return times
+
+
+def format_time(hours):
+    """``HH:MM`` (24-hour, rounded to the minute) or None for NaN."""
+    if math.isnan(hours):
+        return None
+    minutes = int(math.floor(_fix_hour(hours + 0.5 / 60) * 60))
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def _adjust_high_latitudes(times, params, rule):
+    night = _fix_hour(times['sunrise'] - times['sunset'])
+    
+    def adjust(value, base, angle, before_base):
+        portion = {'AngleBased': angle / 60, 'OneSeventh': 1 / 7}.get(rule, 1 / 2) * night
+        gap = _fix_hour(base - value) if before_base else _fix_hour(value - base)
+        if math.isnan(value) or gap > portion:
+            return base - portion if before_base else base + portion
+        return value
+    
+    times['fajr'] = adjust(times['fajr'], times['sunrise'], params['fajr'], True)
+    if 'isha' in params:
+        times['isha'] = adjust(times['isha'], times['sunset'], params['isha'], False)
+    if 'maghrib' in params:
+        times['maghrib'] = adjust(times['maghrib'], times['sunset'], params['maghrib'], False)
+
+
+def _julian_day(day):
+    if isinstance(day, datetime):
+        day = day.date()
+    if not isinstance(day, date_cls):
+        raise TypeError('day must be a date')
+    year, month = day.year, day.month
+    if month <= 2:
+        year -= 1
+        month += 12
+    a = year // 100
+    b = 2 - a + a // 4
+    return math.floor(365.25 * (year + 4716)) + math.floor(30.6001 * (month + 1)) + day.day + b - 1524.5
+
+
+def _sun_position(jd):
+    """Declination (radians) and equation of time (hours) at Julian day ``jd``."""
+    d = jd - 2451545.0
+    g = math.radians(357.529 + 0.98560028 * d)
+    q = (280.459 + 0.98564736 * d) % 360
+    ecliptic_longitude = math.radians(q + 1.915 * math.sin(g) + 0.020 * math.sin(2 * g))
+    obliquity = math.radians(23.439 - 0.00000036 * d)
+    
+    right_ascension = math.degrees(math.atan2(
+        math.cos(obliquity) * math.sin(ecliptic_longitude),
+        math.cos(ecliptic_longitude)
+    )) / 15
+    equation_of_time = q / 15 - _fix_hour(right_ascension)
+    declination = math.asin(math.sin(obliquity) * math.sin(ecliptic_longitude))
+    return declination, equation_of_time
+
+
+def _fix_hour(hours):
+    return hours % 24
@@ -0,0 +1,295 @@
+"""Packed, memory-mapped Quran text.
+
+``build_corpus`` packs one or more alquran.cloud editions (the JSON of
+``/v1/quran/<edition>``) into a single file::
+
+    header   '<4sHI': magic, format version, metadata length
+    metadata JSON: editions, surah details and the section table
+    sections little-endian arrays, each 4-byte aligned:
+             surah_starts, juz_starts, page_starts  uint16 first ayah index
+             ayah_juz uint8, ayah_page uint16       per ayah
+             offsets_<n> uint32 (ayahs + 1)          text offsets of edition n
+             text_<n>                                UTF-8 text of edition n
+
+Ayah indexes are 0-based positions in the mushaf (the global ayah number
+minus one). ``QuranCorpus`` maps the file read-only, so every worker
+process shares the same page-cache copy, and serves ayahs by slicing the
+text blobs at their offsets; only the metadata is parsed, once per process.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+
+MAGIC = b'QRAN'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHI')
+
+SURAH_FIELDS = ('number', 'name', 'englishName', 'englishNameTranslation', 'revelationType')
+EDITION_FIELDS = ('identifier', 'language', 'name', 'englishName', 'format', 'type', 'direction')
+
+
+class CorpusUnavailable(Exception):
+    """The corpus file has not been built or cannot be read."""
+
+
+class UnknownEdition(KeyError):
+    """The corpus has no edition with the requested identifier."""
+
+
+def build_corpus(editions, output):
+    """Pack alquran.cloud edition payloads (``data`` objects) into ``output``.
+    
+    The first edition supplies surah, juz and page structure; every edition
+    must have the same ayahs in the same order. Returns the number of ayahs.
+    """
+    if not editions:
+        raise ValueError('At least one edition is required')
+    
+    primary = editions[0]
+    ayahs = [ayah for surah in primary['surahs'] for ayah in surah['ayahs']]
+    if [ayah['number'] for ayah in ayahs] != list(range(1, len(ayahs) + 1)):
+        raise ValueError('Ayahs must be numbered 1..N in mushaf order')
+    
+    surah_starts = array('H')
+    for surah in primary['surahs']:
+        surah_starts.append(surah['ayahs'][0]['number'] - 1)
+    surah_starts.append(len(ayahs))
+    
+    ayah_juz = array('B', (ayah['juz'] for ayah in ayahs))
+    ayah_page = array('H', (ayah['page'] for ayah in ayahs))
+    
+    sections = [
+        ('surah_starts', surah_starts),
+        ('juz_starts', _starts(ayah_juz)),
+        ('page_starts', _starts(ayah_page)),
+        ('ayah_juz', ayah_juz),
+        ('ayah_page', ayah_page)
+    ]
+    for n, edition in enumerate(editions):
+        texts = [ayah['text'].encode('utf-8') for surah in edition['surahs'] for ayah in surah['ayahs']]
+        if len(texts) != len(ayahs):
+            raise ValueError(f"Edition {edition['edition']['identifier']} has {len(texts)} ayahs, expected {len(ayahs)}")
+        offsets = array('I', [0])
+        for text in texts:
+            offsets.append(offsets[-1] + len(text))
+        sections.append((f'offsets_{n}', offsets))
+        sections.append((f'text_{n}', b''.join(texts)))
+    
+    # Section offsets depend on the metadata length, which depends on the
+    # offsets; lay out relative to the end of the metadata, then fix up
+    layout = {}
+    position = 0
+    for name, data in sections:
+        position = _align(position)
+        size = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        layout[name] = [position, size]
+        position += size
+    
+    metadata = {
+        'editions': [{field: edition['edition'].get(field) for field in EDITION_FIELDS} for edition in editions],
+        'surahs': [
+            dict({field: surah.get(field) for field in SURAH_FIELDS}, numberOfAyahs=len(surah['ayahs']))
+            for surah in primary['surahs']
+        ],
+        'ayah_count': len(ayahs),
+        'sections': layout
+    }
+    base = 0
+    while True:
+        encoded = json.dumps(dict(metadata, base=base), ensure_ascii=False).encode('utf-8')
+        start = _align(HEADER.size + len(encoded))
+        if start == base:
+            break
+        base = start
+    
+    temporary = f'{output}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)))
+        f.write(encoded)
+        for name, data in sections:
+            f.write(b'\0' * (base + layout[name][0] - f.tell()))
+            f.write(data.tobytes() if isinstance(data, array) else data)
+    # Readers that already mapped the old file keep their copy
+    os.replace(temporary, output)
+    return len(ayahs)
+
+
+class QuranCorpus:
+    """Read-only view of a corpus file built by ``build_corpus``.
+    
+    The file is mapped on first use in each process (``QURAN_CORPUS_PATH``);
+    a missing file raises ``CorpusUnavailable`` rather than failing startup.
+    Lookups return dicts shaped like the alquran.cloud API.
+    """
+    
+    def __init__(self, app=None):
+        self.path = None
+        self._lock = threading.Lock()
+        self._mapped = None
+        self._pid = None
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.path = app.config.get('QURAN_CORPUS_PATH')
+        app.extensions['quran_corpus'] = self
+    
+    @property
+    def available(self):
+        try:
+            self._view()
+            return True
+        except CorpusUnavailable:
+            return False
+    
+    def editions(self):
+        return self._view()['metadata']['editions']
+    
+    def surahs(self):
+        return self._view()['metadata']['surahs']
+    
+    def surah(self, number, edition=None):
+        """A whole surah with its ayahs, or None if ``number`` is out of range."""
+        view = self._view()
+        if not 1 <= number <= len(view['metadata']['surahs']):
+            return None
+        first, last = view['surah_starts'][number - 1], view['surah_starts'][number]
+        return dict(
+            view['metadata']['surahs'][number - 1],
+            ayahs=self._ayahs(first, last, edition),
+            edition=self._edition(edition)[1]
+        )
+    
+    def ayah_range(self, number, first, last, edition=None):
+        """Ayahs ``first``..``last`` (inclusive, numbered within the surah)."""
+        view = self._view()
+        if not 1 <= number <= len(view['metadata']['surahs']):
+            return None
+        start, end = view['surah_starts'][number - 1], view['surah_starts'][number]
+        if not 1 <= first <= last <= end - start:
+            return None
+        return dict(
+            view['metadata']['surahs'][number - 1],
+            ayahs=self._ayahs(start + first - 1, start + last, edition),
+            edition=self._edition(edition)[1]
+        )
+    
+    def juz(self, number, edition=None):
+        return self._section('juz_starts', number, edition)
+    
+    def page(self, number, edition=None):
+        return self._section('page_starts', number, edition)
+    
+    def _section(self, table, number, edition):
+        starts = self._view()[table]
+        if not 1 <= number < len(starts):
+            return None
+        first, last = starts[number - 1], starts[number]
+        return {
+            'number': number,
+            'ayahs': self._ayahs(first, last, edition, with_surah=True),
+            'edition': self._edition(edition)[1]
+        }
+    
+    def _ayahs(self, first, last, edition, with_surah=False):
+        view = self._view()
+        n, _ = self._edition(edition)
+        offsets = view['offsets'][n]
+        text = view['text'][n]
+        surahs = view['metadata']['surahs']
+        surah_starts = view['surah_starts']
+        
+        ayahs = []
+        surah = bisect_right(surah_starts, first) - 1
+        for index in range(first, last):
+            while index >= surah_starts[surah + 1]:
+                surah += 1
+            ayah = {
+                'number': index + 1,
+                'text': str(text[offsets[index]:offsets[index + 1]], 'utf-8'),
+                'numberInSurah': index - surah_starts[surah] + 1,
+                'juz': view['ayah_juz'][index],
+                'page': view['ayah_page'][index]
+            }
+            if with_surah:
+                ayah['surah'] = surahs[surah]
+            ayahs.append(ayah)
+        return ayahs
+    
+    def _edition(self, identifier):
+        editions = self._view()['metadata']['editions']
+        if identifier is None:
+            return 0, editions[0]
+        for n, edition in enumerate(editions):
+            if edition['identifier'] == identifier:
+                return n, edition
+        raise UnknownEdition(identifier)
+    
+    def _view(self):
+        mapped = self._mapped
+        if mapped is not None and self._pid == os.getpid():
+            return mapped
+        with self._lock:
+            if self._mapped is None or self._pid != os.getpid():
+                self._mapped = self._map()
+                self._pid = os.getpid()
+            return self._mapped
+    
+    def _map(self):
+        if not self.path:
+            raise CorpusUnavailable('QURAN_CORPUS_PATH is not set')
+        try:
+            with open(self.path, 'rb') as f:
+                # The mapping stays valid after the file is closed
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise CorpusUnavailable(f'Quran corpus not available: {e}') from e
+        
+        magic, version, metadata_length = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise CorpusUnavailable(f'{self.path} is not a version {FORMAT_VERSION} Quran corpus')
+        metadata = json.loads(buffer[HEADER.size:HEADER.size + metadata_length])
+        
+        data = memoryview(buffer)
+        base = metadata['base']
+        
+        def section(name, typecode=None):
+            offset, size = metadata['sections'][name]
+            block = data[base + offset:base + offset + size]
+            return block.cast(typecode) if typecode else block
+        
+        editions = range(len(metadata['editions']))
+        return {
+            'metadata': metadata,
+            'surah_starts': section('surah_starts', 'H'),
+            'juz_starts': section('juz_starts', 'H'),
+            'page_starts': section('page_starts', 'H'),
+            'ayah_juz': section('ayah_juz', 'B'),
+            'ayah_page': section('ayah_page', 'H'),
+            'offsets': [section(f'offsets_{n}', 'I') for n in editions],
+            'text': [section(f'text_{n}') for n in editions]
+        }
+
+
+def _starts(numbers):
+    """First index of each run of 1, 2, 3... in ``numbers``, plus the length."""
+    starts = array('H')
+    for index, number in enumerate(numbers):
+        if number == len(starts) + 1:
+            starts.append(index)
+        elif number != len(starts):
+            raise ValueError(f'Unexpected section number {number} at ayah {index + 1}')
+    starts.append(len(numbers))
+    return starts
+
+
+def _align(position, boundary=4):
+    return (position + boundary - 1) // boundary * boundary
+
+
+quran_corpus = QuranCorpus()
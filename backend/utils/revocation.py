@@ -0,0 +1,191 @@
+import atexit
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from database import db
+from models.revoked_token import RevokedToken
+from utils.background import PeriodicFlusher
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+    
+    Sized for ``capacity`` keys at ``error_rate`` false positives. Positions
+    come from double hashing the two halves of the key's builtin 64-bit
+    ``hash``, so a filter is only meaningful inside the process that built it.
+    """
+    
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def add(self, key):
+        h1, h2 = self._hashes(key)
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % self.size
+            self._bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key):
+        # Hot path: bail out on the first unset bit
+        h1, h2 = self._hashes(key)
+        bits, size = self._bits, self.size
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+    
+    @staticmethod
+    def _hashes(key):
+        h = hash(key)
+        return h & 0xffffffff, (h >> 32) | 1
+
+
+class RevocationList(PeriodicFlusher):
+    """In-memory view of ``revoked_tokens`` for the JWT blocklist check.
+    
+    ``is_revoked`` consults a Bloom filter first, so the usual not-revoked
+    case never touches the exact ``jti -> expires_at`` map or the database.
+    The flusher thread pulls rows revoked since the last sync every
+    ``REVOCATION_SYNC_INTERVAL`` seconds (so a logout reaches other workers
+    within that window), drops entries whose tokens have expired, and
+    rebuilds the filter from what is left (or when it outgrows its
+    capacity). Until the first sync in a process has succeeded, lookups go
+    to the database instead, so a failed sync never lets a revoked token
+    through.
+    """
+    
+    flusher_name = 'revocation-sync'
+    
+    # Re-read this far behind the last sync to cover transactions that
+    # committed late and small clock differences between workers
+    sync_overlap = timedelta(seconds=60)
+    
+    def __init__(self, app=None):
+        super().__init__()
+        self.app = None
+        self.capacity = 100000
+        self.error_rate = 0.001
+        
+        self._lock = threading.Lock()
+        self._revoked = {}  # jti -> expires_at
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._synced_at = None
+        self._stale_after = 0.0  # time.monotonic() deadline for the next sync
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = app.config.get('REVOCATION_SYNC_INTERVAL', 5.0)
+        self.capacity = app.config.get('REVOCATION_BLOOM_CAPACITY', self.capacity)
+        self.error_rate = app.config.get('REVOCATION_BLOOM_ERROR_RATE', self.error_rate)
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        app.extensions['revocation_list'] = self
+        atexit.register(self._stop.set)
+        
+        if not event.contains(db.session, 'after_commit', self._after_commit):
+            event.listen(db.session, 'after_commit', self._after_commit)
+            event.listen(db.session, 'after_rollback', self._after_rollback)
+    
+    def is_revoked(self, jti):
+        if time.monotonic() > self._stale_after:
+            # First use in this process (or the sync thread died with a fork)
+            self.start_flusher()
+            if self._synced_at is None:
+                self.sync()
+            if self._synced_at is None:
+                return db.session.query(RevokedToken.jti).filter_by(jti=jti).first() is not None
+        
+        if jti not in self._bloom:
+            return False
+        return jti in self._revoked
+    
+    def revoke(self, jti, token_type, user_id, expires_at):
+        """Record a revocation; the caller commits the session.
+        
+        The in-memory view only learns about it once that commit succeeds.
+        """
+        db.session.add(RevokedToken(
+            jti=jti,
+            token_type=token_type,
+            user_id=user_id,
+            expires_at=expires_at
+        ))
+        db.session.info.setdefault('revoked_tokens', []).append((jti, expires_at))
+    
+    def flush(self):
+        self.sync()
+    
+    def sync(self):
+        """Load revocations made since the last sync and prune expired ones."""
+        started = datetime.utcnow()
+        try:
+            with self.app.app_context():
+                query = db.session.query(RevokedToken.jti, RevokedToken.expires_at).filter(
+                    RevokedToken.expires_at > started
+                )
+                if self._synced_at is not None:
+                    query = query.filter(RevokedToken.revoked_at >= self._synced_at - self.sync_overlap)
+                rows = query.all()
+                db.session.remove()
+        except Exception:
+            self.app.logger.exception('Revocation sync failed, will retry')
+            return
+        
+        with self._lock:
+            for jti, expires_at in rows:
+                self._remember(jti, expires_at)
+            self._prune(started)
+            if len(self._revoked) > self._bloom.capacity:
+                self._rebuild_bloom()
+            self._synced_at = started
+            self._stale_after = time.monotonic() + 2 * self.flush_interval
+    
+    def prune_table(self):
+        """Delete rows for tokens that have expired anyway."""
+        deleted = RevokedToken.query.filter(
+            RevokedToken.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+    
+    def _after_commit(self, session):
+        revoked = session.info.pop('revoked_tokens', None)
+        if revoked:
+            with self._lock:
+                for jti, expires_at in revoked:
+                    self._remember(jti, expires_at)
+    
+    def _after_rollback(self, session):
+        session.info.pop('revoked_tokens', None)
+    
+    def _remember(self, jti, expires_at):
+        if jti not in self._revoked:
+            self._bloom.add(jti)
+        self._revoked[jti] = expires_at
+    
+    def _prune(self, now):
+        expired = [jti for jti, expires_at in self._revoked.items() if expires_at <= now]
+        if not expired:
+            return
+        for jti in expired:
+            del self._revoked[jti]
+        # Bloom filters cannot delete; rebuild from the surviving entries
+        self._rebuild_bloom()
+    
+    def _rebuild_bloom(self):
+        bloom = BloomFilter(max(self.capacity, 2 * len(self._revoked)), self.error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+
+
+revocation_list = RevocationList()
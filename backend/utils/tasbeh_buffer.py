@@ -0,0 +1,197 @@
+import atexit
+import threading
+
+from sqlalchemy.exc import DataError, IntegrityError
+
+from database import db
+from models.tasbeh_count import TasbehCount
+from models.user import User
+from utils.background import PeriodicFlusher
+from utils.counter_store import get_counter_store
+
+
+class TasbehWriteBuffer(PeriodicFlusher):
+    """In-process write-behind buffer for tasbeh increments.
+    
+    Increments are accumulated per (user_id, phrase_id) and written as one batched
+    upsert when the number of buffered keys reaches ``TASBEH_BUFFER_MAX_PENDING``,
+    every ``TASBEH_BUFFER_MAX_STALENESS`` seconds, and at worker shutdown.
+    
+    Running totals are this process's view: the stored count as of its last
+    flush of the key plus its own unwritten taps. With several gunicorn
+    workers, taps buffered in another worker show up once that worker has
+    flushed and this one has flushed the key again or reloaded it, so
+    totals can lag by about two flush intervals.
+    
+    A batch that fails is retried key by key. Keys rejected by the database
+    (e.g. the user was deleted) are dropped and logged so they cannot block
+    later flushes; keys that fail for any other reason stay buffered.
+    """
+    
+    flusher_name = 'tasbeh-buffer-flusher'
+    
+    def __init__(self, app=None):
+        super().__init__()
+        self.app = None
+        self.enabled = False
+        self.max_pending = 500
+        self.max_staleness = 2.0
+        
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}     # (user_id, phrase_id) -> amount not yet written
+        self._inflight = {}    # (user_id, phrase_id) -> amount being written
+        self._persisted = {}   # (user_id, phrase_id) -> last known stored count
+        
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('TASBEH_WRITE_BEHIND', False)
+        self.max_pending = app.config.get('TASBEH_BUFFER_MAX_PENDING', 500)
+        self.max_staleness = app.config.get('TASBEH_BUFFER_MAX_STALENESS', 2.0)
+        self.flush_interval = self.max_staleness
+        app.extensions['tasbeh_buffer'] = self
+        
+        if self.enabled:
+            atexit.register(self.shutdown)
+    
+    def increment(self, user_id, phrase_id, amount):
+        """Buffer an increment and return the running total for the key."""
+        self.start_flusher()
+        key = (user_id, phrase_id)
+        stored = None
+        
+        while True:
+            with self._lock:
+                if key in self._persisted or stored is not None:
+                    base = self._persisted.setdefault(key, stored)
+                    self._pending[key] = self._pending.get(key, 0) + amount
+                    total = base + self._inflight.get(key, 0) + self._pending[key]
+                    should_flush = len(self._pending) >= self.max_pending
+                    break
+            stored = self._load_count(user_id, phrase_id) or 0
+        
+        if should_flush:
+            self.flush()
+        
+        return total
+    
+    def pending_counts(self, user_id):
+        """Return ``{phrase_id: amount}`` buffered for a user but not yet stored."""
+        with self._lock:
+            counts = {}
+            for source in (self._inflight, self._pending):
+                for (key_user_id, phrase_id), amount in source.items():
+                    if key_user_id == user_id:
+                        counts[phrase_id] = counts.get(phrase_id, 0) + amount
+            return counts
+    
+    def observe(self, counts):
+        """Refresh cached totals from ``{(user_id, phrase_id): count}`` written elsewhere."""
+        with self._lock:
+            for key, count in counts.items():
+                if key in self._persisted:
+                    self._persisted[key] = count
+    
+    def discard(self, user_id, phrase_id, executor):
+        """Write a key's buffered taps through ``executor`` and forget its total.
+        
+        Call inside the transaction that deletes the counter, so the taps and
+        the reset commit together. Returns the amount written; pass it to
+        ``restore`` if that transaction rolls back.
+        """
+        key = (user_id, phrase_id)
+        # Waits for a flush that may be writing this key in another transaction
+        with self._flush_lock:
+            with self._lock:
+                amount = self._pending.pop(key, 0)
+                self._persisted.pop(key, None)
+            if amount:
+                try:
+                    get_counter_store().increment(executor, user_id, phrase_id, amount)
+                except Exception:
+                    self.restore(user_id, phrase_id, amount)
+                    raise
+        return amount
+    
+    def restore(self, user_id, phrase_id, amount):
+        """Re-buffer taps taken by ``discard`` whose transaction rolled back."""
+        with self._lock:
+            key = (user_id, phrase_id)
+            self._pending[key] = self._pending.get(key, 0) + amount
+    
+    def flush(self):
+        """Write all buffered increments in a single batched upsert."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+                self._inflight = dict(batch)
+            
+            try:
+                stored = self._write(batch)
+                retry = {}
+            except Exception:
+                self.app.logger.exception('Tasbeh buffer flush failed, retrying key by key')
+                stored, retry = self._write_each(batch)
+            
+            with self._lock:
+                for key, amount in retry.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+                # Keep cached totals only for keys that are still active so the
+                # cache stays bounded by recent traffic.
+                persisted = {
+                    key: value for key, value in self._persisted.items()
+                    if key in self._pending
+                }
+                persisted.update(stored)
+                self._persisted = persisted
+                self._inflight = {}
+    
+    def _write(self, batch):
+        rows = [
+            {'user_id': user_id, 'phrase_id': phrase_id, 'count': amount}
+            for (user_id, phrase_id), amount in batch.items()
+        ]
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                stored = get_counter_store().increment_many(connection, rows)
+                user_ids = {user_id for user_id, _ in batch}
+                connection.execute(
+                    User.__table__.update()
+                    .where(User.__table__.c.id.in_(user_ids))
+                    .values(data_version=User.__table__.c.data_version + 1)
+                )
+        return stored
+    
+    def _write_each(self, batch):
+        """Write keys one transaction each; returns (stored, keys to retry)."""
+        stored = {}
+        retry = {}
+        keys = iter(batch.items())
+        for key, amount in keys:
+            try:
+                stored.update(self._write({key: amount}))
+            except (IntegrityError, DataError):
+                self.app.logger.exception(
+                    'Dropping %d buffered taps for user %s, phrase %s', amount, *key
+                )
+            except Exception:
+                # Most likely the database is unreachable; keep the rest for
+                # the next flush instead of failing every key in turn
+                self.app.logger.exception('Tasbeh buffer flush failed, will retry')
+                retry[key] = amount
+                retry.update(keys)
+        return stored, retry
+    
+    def _load_count(self, user_id, phrase_id):
+        return db.session.query(TasbehCount.count).filter_by(
+            user_id=user_id,
+            phrase_id=phrase_id
+        ).scalar()
+
+
+tasbeh_buffer = TasbehWriteBuffer()
@@ -0,0 +1,193 @@
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from database import db
+from models.tasbeh_count import TasbehCount
+from models.user import User
+from models.user_phrase import UserPhrase
+from models.user_reading_stats import UserReadingStats
+from models.user_summary import UserSummary
+from utils.counter_store import get_counter_store
+
+
+def phrase_added(phrase):
+    """Account for a new custom phrase; call after it has been flushed."""
+    summary = _locked_summary(phrase.user_id)
+    if summary is None:
+        return
+    summary.custom_phrase_count += 1
+    summary.recent_phrases = ([phrase.to_dict()] + summary.recent_phrases)[:UserSummary.RECENT_PHRASES_LIMIT]
+    summary.last_activity_at = datetime.utcnow()
+
+
+def phrase_removed(phrase):
+    """Account for a deleted custom phrase; call after ``session.delete``."""
+    db.session.flush()
+    summary = _locked_summary(phrase.user_id)
+    if summary is None:
+        return
+    summary.custom_phrase_count -= 1
+    if any(recent['id'] == phrase.id for recent in summary.recent_phrases):
+        summary.recent_phrases = _recent_phrases([phrase.user_id]).get(phrase.user_id, [])
+    summary.last_activity_at = datetime.utcnow()
+
+
+def counter_removed(tasbeh_count):
+    """Account for a deleted tasbeh counter; call after ``session.delete``."""
+    db.session.flush()
+    summary = _locked_summary(tasbeh_count.user_id)
+    if summary is None:
+        return
+    summary.total_dhikr -= tasbeh_count.count
+    summary.tasbeh_phrase_count -= 1
+    summary.last_activity_at = datetime.utcnow()
+
+
+def rebuild_summaries(user_ids, executor=None):
+    """Recompute the summary rows of ``user_ids`` from the source tables.
+    
+    Runs in the current session, or on ``executor`` (a Connection inside a
+    transaction); the caller commits. Existing rows are locked before the
+    source tables are read, so no increment can commit in between and be
+    overwritten. A missing row that another transaction inserts meanwhile
+    is left as that transaction wrote it. Returns the ids of the rows
+    written.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+    
+    session = Session(bind=executor) if isinstance(executor, Connection) else db.session
+    table = UserSummary.__table__
+    existing = set(session.execute(
+        select(table.c.user_id).where(table.c.user_id.in_(user_ids)).with_for_update()
+    ).scalars())
+    
+    tasbeh = {
+        row.user_id: row
+        for row in session.execute(
+            select(
+                TasbehCount.user_id,
+                func.sum(TasbehCount.count).label('total'),
+                func.count().label('phrases'),
+                func.max(TasbehCount.last_updated).label('last_updated')
+            )
+            .where(TasbehCount.user_id.in_(user_ids))
+            .group_by(TasbehCount.user_id)
+        )
+    }
+    phrases = {
+        row.user_id: row
+        for row in session.execute(
+            select(
+                UserPhrase.user_id,
+                func.count().label('phrases'),
+                func.max(UserPhrase.created_at).label('last_created')
+            )
+            .where(UserPhrase.user_id.in_(user_ids))
+            .group_by(UserPhrase.user_id)
+        )
+    }
+    reading = {
+        row.user_id: row
+        for row in session.execute(
+            select(
+                UserReadingStats.user_id,
+                UserReadingStats.quran_verses_read,
+                UserReadingStats.daily_reading_streak
+            ).where(UserReadingStats.user_id.in_(user_ids))
+        )
+    }
+    recent = _recent_phrases(user_ids, session)
+    now = datetime.utcnow()
+    
+    rows = []
+    for user_id in user_ids:
+        counts = tasbeh.get(user_id)
+        custom = phrases.get(user_id)
+        stats = reading.get(user_id)
+        activity = [
+            value for value in (
+                counts.last_updated if counts else None,
+                custom.last_created if custom else None
+            )
+            if value is not None
+        ]
+        rows.append({
+            'user_id': user_id,
+            'total_dhikr': counts.total if counts else 0,
+            'tasbeh_phrase_count': counts.phrases if counts else 0,
+            'custom_phrase_count': custom.phrases if custom else 0,
+            'quran_verses_read': (stats.quran_verses_read or 0) if stats else 0,
+            'reading_streak': (stats.daily_reading_streak or 0) if stats else 0,
+            'recent_phrases': recent.get(user_id, []),
+            'last_activity_at': max(activity) if activity else None,
+            'updated_at': now
+        })
+    
+    stmt = get_counter_store().insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            column: stmt.excluded[column]
+            for column in rows[0] if column != 'user_id'
+        },
+        # Only rows locked above; see the docstring
+        where=table.c.user_id.in_(existing)
+    ).returning(table.c.user_id)
+    written = set(session.execute(stmt).scalars())
+    
+    if session is db.session:
+        # Summaries already loaded in the session are now stale
+        for obj in list(db.session.identity_map.values()):
+            if isinstance(obj, UserSummary) and obj.user_id in user_ids:
+                db.session.expire(obj)
+    else:
+        session.close()
+    return written
+
+
+def rebuild_all_summaries(batch_size=1000):
+    """Rebuild every user's summary, committing per batch; yields users done so far."""
+    done = 0
+    last_id = 0
+    while True:
+        user_ids = db.session.execute(
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(batch_size)
+        ).scalars().all()
+        if not user_ids:
+            break
+        done += len(rebuild_summaries(user_ids))
+        db.session.commit()
+        last_id = user_ids[-1]
+        yield done
+
+
+def _locked_summary(user_id):
+    # A missing row (user created before summaries existed) is rebuilt from
+    # the source tables, which already include the caller's flushed write
+    summary = db.session.query(UserSummary).filter_by(user_id=user_id).with_for_update().first()
+    if summary is None:
+        rebuild_summaries([user_id])
+    return summary
+
+
+def _recent_phrases(user_ids, session=None):
+    position = func.row_number().over(
+        partition_by=UserPhrase.user_id,
+        order_by=(UserPhrase.created_at.desc(), UserPhrase.id.desc())
+    ).label('position')
+    ranked = select(UserPhrase.id, position).where(UserPhrase.user_id.in_(user_ids)).subquery()
+    
+    recent = {}
+    for phrase in (session or db.session).execute(
+        select(UserPhrase)
+        .join(ranked, ranked.c.id == UserPhrase.id)
+        .where(ranked.c.position <= UserSummary.RECENT_PHRASES_LIMIT)
+        .order_by(UserPhrase.user_id, UserPhrase.created_at.desc(), UserPhrase.id.desc())
+    ).scalars():
+        recent.setdefault(phrase.user_id, []).append(phrase.to_dict())
+    return recent
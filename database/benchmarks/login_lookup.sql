@@ -0,0 +1,69 @@
+-- Login lookup benchmark: OR over username/email vs. one normalized equality.
+--
+--   psql "$DATABASE_URL" -f database/benchmarks/login_lookup.sql
+--
+-- Builds a throwaway 1M-row copy of the users columns involved, then shows
+-- the plan and timing for the old login query, the old query made
+-- case-insensitive (what it would take without normalized columns), and
+-- the two lookups auth.login() now issues. Everything runs in a rolled back
+-- transaction.
+\timing on
+BEGIN;
+
+CREATE TEMP TABLE bench_users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(80) UNIQUE NOT NULL,
+    email VARCHAR(120) UNIQUE NOT NULL,
+    username_normalized VARCHAR(80) UNIQUE NOT NULL,
+    email_normalized VARCHAR(120) UNIQUE NOT NULL
+) ON COMMIT DROP;
+
+INSERT INTO bench_users (username, email, username_normalized, email_normalized)
+SELECT 'User' || g, 'User' || g || '@example.com', 'user' || g, 'user' || g || '@example.com'
+FROM generate_series(1, 1000000) AS g;
+
+ANALYZE bench_users;
+
+-- Old query: BitmapOr over two index scans, case-sensitive
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_users
+WHERE username = 'User654321' OR email = 'User654321';
+
+-- Old query made case-insensitive: no usable index, sequential scan
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_users
+WHERE lower(username) = 'user654321' OR lower(email) = 'user654321';
+
+-- New: username login, single unique index scan
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_users
+WHERE username_normalized = 'user654321';
+
+-- New: email login, single unique index scan
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_users
+WHERE email_normalized = 'user654321@example.com';
+
+-- Latency over 10k random lookups of each form
+DO $$
+DECLARE
+    started TIMESTAMP;
+    n INTEGER;
+BEGIN
+    started := clock_timestamp();
+    FOR i IN 1..10000 LOOP
+        n := 1 + floor(random() * 1000000)::INTEGER;
+        PERFORM 1 FROM bench_users WHERE username = 'User' || n OR email = 'User' || n;
+    END LOOP;
+    RAISE NOTICE 'OR lookup:         % us/query', round(extract(epoch FROM clock_timestamp() - started) * 100, 1);
+
+    started := clock_timestamp();
+    FOR i IN 1..10000 LOOP
+        n := 1 + floor(random() * 1000000)::INTEGER;
+        PERFORM 1 FROM bench_users WHERE username_normalized = 'user' || n;
+    END LOOP;
+    RAISE NOTICE 'normalized lookup: % us/query', round(extract(epoch FROM clock_timestamp() - started) * 100, 1);
+END
+$$;
+
+ROLLBACK;
@@ -8,9 +8,13 @@ CREATE TABLE IF NOT EXISTS users (
     public_id UUID DEFAULT uuid_generate_v4() UNIQUE NOT NULL,
     username VARCHAR(80) UNIQUE NOT NULL,
     email VARCHAR(120) UNIQUE NOT NULL,
+    username_normalized VARCHAR(80) UNIQUE NOT NULL,
+    email_normalized VARCHAR(120) UNIQUE NOT NULL,
     password_hash VARCHAR(255) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    is_active BOOLEAN DEFAULT TRUE
+    is_active BOOLEAN DEFAULT TRUE,
+    is_admin BOOLEAN DEFAULT FALSE,
+    data_version INTEGER NOT NULL DEFAULT 0
 );
 
 -- Create user_phrases table
@@ -18,17 +22,83 @@ CREATE TABLE IF NOT EXISTS user_phrases (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
     phrase TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create tasbeh_phrases catalog (IDs follow ISLAMIC_PHRASES order)
+CREATE TABLE IF NOT EXISTS tasbeh_phrases (
+    id SMALLINT PRIMARY KEY,
+    text VARCHAR(200) UNIQUE NOT NULL
+);
+
+INSERT INTO tasbeh_phrases (id, text) VALUES
+    (1, 'سبحان الله'),
+    (2, 'الحمد لله'),
+    (3, 'الله أكبر'),
+    (4, 'لا إله إلا الله'),
+    (5, 'اللهم صل على سيدنا محمد'),
+    (6, 'أستغفر الله'),
+    (7, 'لا حول ولا قوة إلا بالله'),
+    (8, 'بسم الله الرحمن الرحيم')
+ON CONFLICT DO NOTHING;
+
 -- Create tasbeh_counts table
 CREATE TABLE IF NOT EXISTS tasbeh_counts (
     id SERIAL PRIMARY KEY,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    phrase VARCHAR(200) NOT NULL,
+    phrase_id SMALLINT NOT NULL REFERENCES tasbeh_phrases(id),
     count INTEGER DEFAULT 0,
     last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(user_id, phrase)
+    CONSTRAINT unique_user_phrase UNIQUE(user_id, phrase_id)
+);
+
+-- Create tasbeh_devices table
+CREATE TABLE IF NOT EXISTS tasbeh_devices (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    device_id VARCHAR(100) NOT NULL,
+    last_seq BIGINT NOT NULL DEFAULT 0,
+    seq_window BIGINT NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, device_id)
+);
+
+-- Create tasbeh_device_counters table (cumulative count per device and phrase)
+CREATE TABLE IF NOT EXISTS tasbeh_device_counters (
+    device_id INTEGER NOT NULL REFERENCES tasbeh_devices(id) ON DELETE CASCADE,
+    phrase_id SMALLINT NOT NULL REFERENCES tasbeh_phrases(id),
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (device_id, phrase_id)
+);
+
+-- Create tasbeh history rollup tables (UTC buckets)
+CREATE TABLE IF NOT EXISTS tasbeh_hourly (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMP NOT NULL,
+    phrase_id SMALLINT NOT NULL REFERENCES tasbeh_phrases(id),
+    count INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT unique_user_hour_phrase UNIQUE(user_id, bucket_start, phrase_id)
+);
+
+CREATE TABLE IF NOT EXISTS tasbeh_daily (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    phrase_id SMALLINT NOT NULL REFERENCES tasbeh_phrases(id),
+    count INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT unique_user_day_phrase UNIQUE(user_id, day, phrase_id)
+);
+
+-- Create revoked_tokens table (JWT logout / revocation)
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    id SERIAL PRIMARY KEY,
+    jti VARCHAR(36) UNIQUE NOT NULL,
+    token_type VARCHAR(10) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create user_locations table
@@ -99,7 +169,21 @@ CREATE TABLE IF NOT EXISTS user_reading_stats (
     daily_reading_streak INTEGER DEFAULT 0,
     total_reading_days INTEGER DEFAULT 0,
     last_reading_date DATE,
-    favorite_reciter VARCHAR(50) DEFAULT 'ar.alafasy'
+    favorite_reciter VARCHAR(50) DEFAULT 'ar.alafasy',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create user_summary table (dashboard totals maintained by the write paths)
+CREATE TABLE IF NOT EXISTS user_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_dhikr BIGINT NOT NULL DEFAULT 0,
+    tasbeh_phrase_count INTEGER NOT NULL DEFAULT 0,
+    custom_phrase_count INTEGER NOT NULL DEFAULT 0,
+    quran_verses_read INTEGER NOT NULL DEFAULT 0,
+    reading_streak INTEGER NOT NULL DEFAULT 0,
+    recent_phrases JSON NOT NULL DEFAULT '[]',
+    last_activity_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create user_achievements table
@@ -109,14 +193,31 @@ CREATE TABLE IF NOT EXISTS user_achievements (
     achievement_type VARCHAR(50) NOT NULL,
     achievement_name VARCHAR(100) NOT NULL,
     achievement_data JSONB DEFAULT '{}',
-    earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create sync_tombstones table (deletions reported by /api/sync)
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entity VARCHAR(30) NOT NULL,
+    entity_key VARCHAR(200) NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_public_id ON users(public_id);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked_at ON revoked_tokens(revoked_at);
 CREATE INDEX IF NOT EXISTS idx_tasbeh_counts_user_id ON tasbeh_counts(user_id);
+CREATE INDEX IF NOT EXISTS idx_user_phrases_user_created ON user_phrases(user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_user_phrases_user_updated ON user_phrases(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasbeh_counts_user_updated ON tasbeh_counts(user_id, last_updated);
+CREATE INDEX IF NOT EXISTS idx_user_achievements_user_updated ON user_achievements(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_user_deleted ON sync_tombstones(user_id, deleted_at);
 CREATE INDEX IF NOT EXISTS idx_quran_progress_user_id ON quran_progress(user_id);
 CREATE INDEX IF NOT EXISTS idx_quran_bookmarks_user_id ON quran_bookmarks(user_id);
 CREATE INDEX IF NOT EXISTS idx_hadith_favorites_user_id ON hadith_favorites(user_id);
@@ -142,3 +243,21 @@ CREATE TRIGGER update_user_locations_updated_at
     BEFORE UPDATE ON user_locations
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_phrases_updated_at ON user_phrases;
+CREATE TRIGGER update_user_phrases_updated_at
+    BEFORE UPDATE ON user_phrases
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_reading_stats_updated_at ON user_reading_stats;
+CREATE TRIGGER update_user_reading_stats_updated_at
+    BEFORE UPDATE ON user_reading_stats
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_achievements_updated_at ON user_achievements;
+CREATE TRIGGER update_user_achievements_updated_at
+    BEFORE UPDATE ON user_achievements
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
@@ -0,0 +1,35 @@
+-- Tables added before the phrase_id migration: per-device sequence
+-- tracking for POST /api/tasbeh/count/batch and the hourly/daily history
+-- rollups. Created here in their original VARCHAR phrase form so that
+-- 001_tasbeh_phrase_ids.sql can convert them; run first when upgrading a
+-- database created from the original init.sql.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS tasbeh_devices (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    device_id VARCHAR(100) NOT NULL,
+    last_seq BIGINT NOT NULL DEFAULT 0,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, device_id)
+);
+
+CREATE TABLE IF NOT EXISTS tasbeh_hourly (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    bucket_start TIMESTAMP NOT NULL,
+    phrase VARCHAR(200) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT unique_user_hour_phrase UNIQUE(user_id, bucket_start, phrase)
+);
+
+CREATE TABLE IF NOT EXISTS tasbeh_daily (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    phrase VARCHAR(200) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT unique_user_day_phrase UNIQUE(user_id, day, phrase)
+);
+
+COMMIT;
@@ -0,0 +1,54 @@
+-- Move tasbeh counters and history from VARCHAR(200) phrases to SMALLINT
+-- IDs in the tasbeh_phrases catalog. Safe to run on a database created from
+-- an earlier init.sql once 000_tasbeh_devices_and_rollups.sql has created
+-- the history tables; run once before deploying the phrase_id models.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS tasbeh_phrases (
+    id SMALLINT PRIMARY KEY,
+    text VARCHAR(200) UNIQUE NOT NULL
+);
+
+INSERT INTO tasbeh_phrases (id, text) VALUES
+    (1, 'سبحان الله'),
+    (2, 'الحمد لله'),
+    (3, 'الله أكبر'),
+    (4, 'لا إله إلا الله'),
+    (5, 'اللهم صل على سيدنا محمد'),
+    (6, 'أستغفر الله'),
+    (7, 'لا حول ولا قوة إلا بالله'),
+    (8, 'بسم الله الرحمن الرحيم')
+ON CONFLICT DO NOTHING;
+
+-- Catalog any stored phrase that is not one of the defaults
+INSERT INTO tasbeh_phrases (id, text)
+SELECT (SELECT COALESCE(MAX(id), 0) FROM tasbeh_phrases) + ROW_NUMBER() OVER (ORDER BY phrase), phrase
+FROM (
+    SELECT phrase FROM tasbeh_counts
+    UNION SELECT phrase FROM tasbeh_hourly
+    UNION SELECT phrase FROM tasbeh_daily
+) stored
+WHERE phrase NOT IN (SELECT text FROM tasbeh_phrases);
+
+-- tasbeh_counts
+ALTER TABLE tasbeh_counts ADD COLUMN phrase_id SMALLINT REFERENCES tasbeh_phrases(id);
+UPDATE tasbeh_counts c SET phrase_id = p.id FROM tasbeh_phrases p WHERE p.text = c.phrase;
+ALTER TABLE tasbeh_counts ALTER COLUMN phrase_id SET NOT NULL;
+ALTER TABLE tasbeh_counts DROP COLUMN phrase;
+ALTER TABLE tasbeh_counts ADD CONSTRAINT unique_user_phrase UNIQUE (user_id, phrase_id);
+
+-- tasbeh_hourly
+ALTER TABLE tasbeh_hourly ADD COLUMN phrase_id SMALLINT REFERENCES tasbeh_phrases(id);
+UPDATE tasbeh_hourly h SET phrase_id = p.id FROM tasbeh_phrases p WHERE p.text = h.phrase;
+ALTER TABLE tasbeh_hourly ALTER COLUMN phrase_id SET NOT NULL;
+ALTER TABLE tasbeh_hourly DROP COLUMN phrase;
+ALTER TABLE tasbeh_hourly ADD CONSTRAINT unique_user_hour_phrase UNIQUE (user_id, bucket_start, phrase_id);
+
+-- tasbeh_daily
+ALTER TABLE tasbeh_daily ADD COLUMN phrase_id SMALLINT REFERENCES tasbeh_phrases(id);
+UPDATE tasbeh_daily d SET phrase_id = p.id FROM tasbeh_phrases p WHERE p.text = d.phrase;
+ALTER TABLE tasbeh_daily ALTER COLUMN phrase_id SET NOT NULL;
+ALTER TABLE tasbeh_daily DROP COLUMN phrase;
+ALTER TABLE tasbeh_daily ADD CONSTRAINT unique_user_day_phrase UNIQUE (user_id, day, phrase_id);
+
+COMMIT;
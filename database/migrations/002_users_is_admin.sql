@@ -0,0 +1,3 @@
+-- Admin flag used to authorize the all-users tasbeh export.
+-- Grant with: UPDATE users SET is_admin = TRUE WHERE username = '...';
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_admin BOOLEAN DEFAULT FALSE;
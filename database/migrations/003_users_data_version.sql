@@ -0,0 +1,2 @@
+-- Per-user version counter backing weak ETags on read endpoints.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS data_version INTEGER NOT NULL DEFAULT 0;
@@ -0,0 +1,13 @@
+-- Case-insensitive login keys: casefolded username and lowercased email.
+-- The columns are filled by the application's own normalizers (Python
+-- str.casefold() differs from SQL lower() for ß, final sigma and other
+-- non-ASCII letters), so after this file run:
+--   flask users normalize-logins
+-- which refuses to write anything while two users would share a key, and
+-- then 011_users_normalized_login_constraints.sql.
+BEGIN;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS username_normalized VARCHAR(80);
+ALTER TABLE users ADD COLUMN IF NOT EXISTS email_normalized VARCHAR(120);
+
+COMMIT;
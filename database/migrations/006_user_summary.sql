@@ -0,0 +1,60 @@
+-- Per-user dashboard summary, kept current by the write paths. Existing
+-- users are backfilled below with the values
+--   flask --app app users rebuild-summaries
+-- would compute, so the counters never start from a missing row.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS user_summary (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    total_dhikr BIGINT NOT NULL DEFAULT 0,
+    tasbeh_phrase_count INTEGER NOT NULL DEFAULT 0,
+    custom_phrase_count INTEGER NOT NULL DEFAULT 0,
+    quran_verses_read INTEGER NOT NULL DEFAULT 0,
+    reading_streak INTEGER NOT NULL DEFAULT 0,
+    recent_phrases JSON NOT NULL DEFAULT '[]',
+    last_activity_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO user_summary (
+    user_id, total_dhikr, tasbeh_phrase_count, custom_phrase_count,
+    quran_verses_read, reading_streak, recent_phrases, last_activity_at, updated_at
+)
+SELECT
+    u.id,
+    COALESCE(t.total, 0),
+    COALESCE(t.phrases, 0),
+    COALESCE(p.phrases, 0),
+    COALESCE(r.quran_verses_read, 0),
+    COALESCE(r.daily_reading_streak, 0),
+    COALESCE(recent.phrases, '[]'),
+    GREATEST(t.last_updated, p.last_created),
+    CURRENT_TIMESTAMP
+FROM users u
+LEFT JOIN (
+    SELECT user_id, SUM(count) AS total, COUNT(*) AS phrases, MAX(last_updated) AS last_updated
+    FROM tasbeh_counts GROUP BY user_id
+) t ON t.user_id = u.id
+LEFT JOIN (
+    SELECT user_id, COUNT(*) AS phrases, MAX(created_at) AS last_created
+    FROM user_phrases GROUP BY user_id
+) p ON p.user_id = u.id
+LEFT JOIN user_reading_stats r ON r.user_id = u.id
+-- Newest five custom phrases, shaped like UserPhrase.to_dict()
+LEFT JOIN LATERAL (
+    SELECT json_agg(json_build_object(
+        'id', latest.id,
+        'phrase', latest.phrase,
+        'created_at', to_char(latest.created_at, 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+        'updated_at', to_char(latest.updated_at, 'YYYY-MM-DD"T"HH24:MI:SS.US')
+    ) ORDER BY latest.created_at DESC, latest.id DESC) AS phrases
+    FROM (
+        SELECT id, phrase, created_at, updated_at FROM user_phrases
+        WHERE user_id = u.id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 5
+    ) latest
+) recent ON TRUE
+ON CONFLICT (user_id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,4 @@
+-- Composite index for keyset pagination of GET /api/user/phrases.
+-- CONCURRENTLY avoids blocking writes; run outside a transaction.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_phrases_user_created
+    ON user_phrases (user_id, created_at DESC, id DESC);
@@ -0,0 +1,43 @@
+-- Change tracking for GET /api/sync: updated_at on the user-owned tables
+-- that lacked it, (user_id, change column) indexes, and a tombstone table
+-- for deletions. Relies on update_updated_at_column() from init.sql.
+BEGIN;
+
+ALTER TABLE user_phrases ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+UPDATE user_phrases SET updated_at = created_at WHERE created_at IS NOT NULL;
+ALTER TABLE user_reading_stats ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE user_achievements ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP;
+UPDATE user_achievements SET updated_at = earned_at WHERE earned_at IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entity VARCHAR(30) NOT NULL,
+    entity_key VARCHAR(200) NOT NULL,
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_user_phrases_user_updated ON user_phrases(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_tasbeh_counts_user_updated ON tasbeh_counts(user_id, last_updated);
+CREATE INDEX IF NOT EXISTS idx_user_achievements_user_updated ON user_achievements(user_id, updated_at);
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_user_deleted ON sync_tombstones(user_id, deleted_at);
+
+DROP TRIGGER IF EXISTS update_user_phrases_updated_at ON user_phrases;
+CREATE TRIGGER update_user_phrases_updated_at
+    BEFORE UPDATE ON user_phrases
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_reading_stats_updated_at ON user_reading_stats;
+CREATE TRIGGER update_user_reading_stats_updated_at
+    BEFORE UPDATE ON user_reading_stats
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS update_user_achievements_updated_at ON user_achievements;
+CREATE TRIGGER update_user_achievements_updated_at
+    BEFORE UPDATE ON user_achievements
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+COMMIT;
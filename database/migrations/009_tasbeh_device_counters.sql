@@ -0,0 +1,13 @@
+-- Cumulative per-device counters for POST /api/tasbeh/merge. Each row holds
+-- the highest count a device has reported for a phrase; totals stay in
+-- tasbeh_counts and only grow by the difference.
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS tasbeh_device_counters (
+    device_id INTEGER NOT NULL REFERENCES tasbeh_devices(id) ON DELETE CASCADE,
+    phrase_id SMALLINT NOT NULL REFERENCES tasbeh_phrases(id),
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (device_id, phrase_id)
+);
+
+COMMIT;
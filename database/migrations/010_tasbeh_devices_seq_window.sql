@@ -0,0 +1,3 @@
+-- Out-of-order batch sequences for POST /api/tasbeh/count/batch: bit n of
+-- seq_window marks last_seq + 1 + n as already applied.
+ALTER TABLE tasbeh_devices ADD COLUMN IF NOT EXISTS seq_window BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,13 @@
+-- Unique indexes behind the login keys added by 004, so login is a single
+-- index lookup. Run after `flask users normalize-logins` has filled them.
+-- Replaces constraints left by an earlier version of 004.
+BEGIN;
+
+ALTER TABLE users ALTER COLUMN username_normalized SET NOT NULL;
+ALTER TABLE users ALTER COLUMN email_normalized SET NOT NULL;
+ALTER TABLE users DROP CONSTRAINT IF EXISTS users_username_normalized_key;
+ALTER TABLE users DROP CONSTRAINT IF EXISTS users_email_normalized_key;
+ALTER TABLE users ADD CONSTRAINT users_username_normalized_key UNIQUE (username_normalized);
+ALTER TABLE users ADD CONSTRAINT users_email_normalized_key UNIQUE (email_normalized);
+
+COMMIT;